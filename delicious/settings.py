@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+import django
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -20,6 +22,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its wall time covers every other middleware
+    'recipes.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -28,6 +32,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'recipes.middleware.RoleMiddleware',
+    'recipes.middleware.AnonymousPageCacheMiddleware',
     'recipes.middleware.ErrorLoggingMiddleware',
 ]
 
@@ -35,7 +40,8 @@ ROOT_URLCONF = 'delicious.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's backend plus render timing for MetricsMiddleware
+        'BACKEND': 'recipes.metrics.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -50,14 +56,121 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'delicious.wsgi.application'
+# Async read views (home, browse, detail, API) serve many connections per
+# process under an ASGI server, e.g. `uvicorn delicious.asgi:application`
+ASGI_APPLICATION = 'delicious.asgi.application'
 
 # Database
+# Pick the profile with DELICIOUS_DB_PROFILE: 'default' (stock SQLite) or
+# 'production': WAL plus tuned pragmas (run on every new connection by
+# recipes.db), persistent connections with health checks and, on Django
+# 5.1+, IMMEDIATE write transactions so writers queue on busy_timeout
+# instead of failing with "database is locked" (Django 5.0, the oldest
+# supported release, has no transaction_mode).
+# `manage.py benchmark_db` compares the profiles.
+DB_PROFILES = {
+    'default': {
+        'DATABASE': {},
+        'PRAGMAS': {},
+    },
+    'production': {
+        'DATABASE': {
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'} if django.VERSION >= (5, 1) else {},
+        },
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            'busy_timeout': 20000,           # ms a writer waits for the lock
+            'synchronous': 'NORMAL',         # safe with WAL, fsyncs only at checkpoints
+            'cache_size': -20000,            # KiB of page cache per connection
+            'mmap_size': 128 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+        },
+    },
+}
+DB_PROFILE = os.environ.get('DELICIOUS_DB_PROFILE', 'default')
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        **DB_PROFILES[DB_PROFILE]['DATABASE'],
     }
 }
+SQLITE_PRAGMAS = DB_PROFILES[DB_PROFILE]['PRAGMAS']
+
+# Cache
+# Pick the backend with DELICIOUS_CACHE_BACKEND: 'locmem' (default, per process),
+# 'file' or 'database' (run `manage.py createcachetable` first).
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'delicious',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    },
+    'database': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'delicious_cache',
+    },
+}
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('DELICIOUS_CACHE_BACKEND', 'locmem')],
+}
+
+# Sessions
+# Pick the engine with DELICIOUS_SESSION_ENGINE: 'cached_db' (default; cache
+# in front of django_session), 'signed_cookies' (no server-side storage) or
+# 'db'. With several workers use a shared cache backend (see above).
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('DELICIOUS_SESSION_ENGINE', 'cached_db')]
+
+# request.user is rebuilt from a cached user + profile snapshot; saves and
+# deletes drop it (recipes.backends)
+AUTHENTICATION_BACKENDS = ['recipes.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = 60 * 60
+
+# Query results are invalidated by version bumps; the timeout only lets
+# unreachable old versions age out of the backend.
+QUERY_CACHE_TIMEOUT = 60 * 60 * 24
+# Cached answers of the as-you-type username check; signups clear their own entry
+USERNAME_CHECK_CACHE_TIMEOUT = 60
+
+# Anonymous full-page cache (AnonymousPageCacheMiddleware)
+PAGE_CACHE_URL_NAMES = ('home', 'recipe_list', 'recipe_detail')
+PAGE_CACHE_TIMEOUT = 60          # seconds a page is served as fresh
+PAGE_CACHE_STALE = 5 * 60        # extra seconds a stale copy may be served during a rebuild
+PAGE_CACHE_LOCK_TIMEOUT = 10     # max seconds one request holds the rebuild lock
+ANONYMOUS_PAGE_MAX_AGE = 60      # Cache-Control max-age for anonymous HTML pages
+
+# Background SystemErrorLog writer (recipes.errorlog)
+ERROR_LOG_QUEUE_SIZE = 1000      # errors beyond this are dropped and counted
+ERROR_LOG_BATCH_SIZE = 100
+ERROR_LOG_FLUSH_INTERVAL = 1.0   # seconds to wait while filling a batch
+ERRORS_PER_PAGE = 25             # error groups per page on the dev dashboard
+MODERATION_PER_PAGE = 100        # rows per panel on the admin moderation dashboard
+
+# Who may scrape /dev/metrics/ without a staff login (recipes.metrics):
+# "Authorization: Bearer <DELICIOUS_METRICS_TOKEN>", or a client address in
+# DELICIOUS_METRICS_ALLOWED_IPS (comma separated addresses/networks, matched
+# against REMOTE_ADDR). Both empty: staff only. /dev/metrics/summary/ stays
+# staff only either way.
+METRICS_TOKEN = os.environ.get('DELICIOUS_METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('DELICIOUS_METRICS_ALLOWED_IPS', '').split(',') if ip.strip()]
+
+# Rows fetched per round trip by streaming exports (recipes.exports)
+EXPORT_CHUNK_SIZE = 2000
+
+# Background jobs (recipes.jobs, run with `manage.py runworker`)
+JOBS_RUN_INLINE = False          # True: run jobs right after commit, no worker needed
+JOBS_RETRY_BACKOFF = 30          # seconds before the first retry; doubles per attempt
+JOBS_VISIBILITY_TIMEOUT = 300    # seconds before a claimed job may be re-claimed
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -86,10 +199,34 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# collectstatic minifies the CSS bundles, hashes every file name and writes
+# .gz siblings (recipes.staticfiles). Run it before starting with DEBUG off.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'recipes.staticfiles.BundledManifestStorage'},
+}
+# bundle name -> source files, in order; linked with {% stylesheet name %}
+STATIC_BUNDLES = {
+    'base': ['css/style.css', 'css/base.css'],
+    'list': ['css/list.css'],
+    'detail': ['css/detail.css'],
+}
+# Cache lifetime of un-hashed static URLs; hashed ones are immutable
+STATIC_MAX_AGE = 5 * 60
+
 # Media (if later used)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resized variants generated for every uploaded image (recipes.images):
+# name -> (width, height, 'crop' to fill exactly | 'fit' to fit inside)
+IMAGE_VARIANTS = {
+    'thumb': (160, 160, 'crop'),
+    'card': (480, 320, 'crop'),
+    'hero': (1280, 720, 'fit'),
+}
+IMAGE_VARIANT_QUALITY = 80
+
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
 LOGIN_URL = 'login'
@@ -104,3 +241,10 @@ SITE_NAME = 'Delicious'
 DEVELOPER_INVITE_CODE = 'changeme-dev-invite-2026'
 
 DEVELOPER_MASTER_KEY = "security-key-2026"
+
+# Number of recipe cards per "page" on the browse page (keyset paginated)
+RECIPES_PER_PAGE = 12
+# Comments rendered with the recipe page; the rest load on demand
+COMMENTS_PER_PAGE = 10
+# Largest ?limit= accepted by the JSON API
+API_MAX_PAGE_SIZE = 100
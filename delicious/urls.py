@@ -1,8 +1,12 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from recipes.staticfiles import serve as serve_static
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('recipes.urls')),
@@ -13,3 +17,6 @@ handler500 = 'recipes.views.custom_500'
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+else:
+    # Collected, hashed and precompressed assets (see recipes.staticfiles)
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_static)]
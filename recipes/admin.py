@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Recipe, Category, Comment, Rating, Feedback, UserProfile, SystemErrorLog, DeveloperInviteCode
+from .models import Recipe, Category, Comment, Rating, Feedback, UserProfile, SystemErrorLog, DeveloperInviteCode, Job
 
 admin.site.register(Recipe)
 admin.site.register(Category)
@@ -10,11 +10,18 @@ admin.site.register(UserProfile)
 
 @admin.register(SystemErrorLog)
 class SystemErrorLogAdmin(admin.ModelAdmin):
-    list_display = ('error_message', 'user', 'path', 'created_at', 'resolved')
+    list_display = ('error_message', 'user', 'path', 'occurrences', 'created_at', 'last_seen', 'resolved')
     list_filter = ('resolved', 'created_at')
-    readonly_fields = ('traceback',)
+    readonly_fields = ('traceback', 'fingerprint')
 
 @admin.register(DeveloperInviteCode)
 class DeveloperInviteCodeAdmin(admin.ModelAdmin):
     list_display = ('code', 'is_active', 'used_by', 'created_at')
     list_filter = ('is_active',)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'kind', 'status', 'priority', 'attempts', 'run_after', 'created_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('last_error',)
@@ -0,0 +1,198 @@
+"""Read-only JSON API (v1) for the mobile client.
+
+Rows are fetched with ``values()`` and serialized straight from the dicts,
+no model instances are built. Every endpoint takes ``?fields=a,b,c`` to
+pick a subset of its fields. Lists use the same keyset cursors as the HTML
+pages, and responses carry ETag/Last-Modified validators (see
+``recipes.conditional``) so unchanged resources come back as 304. The
+views are async and use the async ORM (see ``delicious/asgi.py``).
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+
+from .caching import CATALOG, aget_version
+from .conditional import conditional, make_etag
+from .models import Category, Comment, Recipe
+from .pagination import apaginate_keyset
+from .views import browse_queryset
+
+# public name -> values() path
+RECIPE_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'short_description': 'short_description',
+    'ingredients': 'ingredients',
+    'steps': 'steps',
+    'category': 'category__slug',
+    'author': 'author__username',
+    'image': 'image',
+    'like_count': 'like_count',
+    'rating_count': 'rating_count',
+    'avg_rating': 'avg_rating',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+RECIPE_LIST_DEFAULT = (
+    'id', 'slug', 'title', 'short_description', 'category', 'author', 'image',
+    'like_count', 'rating_count', 'avg_rating', 'created_at', 'updated_at',
+)
+CATEGORY_FIELDS = {'id': 'id', 'name': 'name', 'slug': 'slug'}
+COMMENT_FIELDS = {'id': 'id', 'user': 'user__username', 'content': 'content', 'created_at': 'created_at'}
+
+
+class ApiError(ValueError):
+    pass
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False})
+
+
+def api_view(view):
+    """JSON errors for bad input/missing objects, and revalidation-friendly caching."""
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        try:
+            response = await view(request, *args, **kwargs)
+        except ApiError as e:
+            return _json({'detail': str(e)}, status=400)
+        except Http404:
+            return _json({'detail': 'Not found.'}, status=404)
+        if response.status_code in (200, 304):
+            # Only approved, user-independent data is served here
+            patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        return response
+    return inner
+
+
+def _fields(request, available, default=None):
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(default or available)
+    fields = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}.")
+    return fields
+
+
+def _limit(request, default):
+    raw = request.GET.get('limit')
+    if not raw:
+        return default
+    if not raw.isdigit() or not 1 <= int(raw) <= settings.API_MAX_PAGE_SIZE:
+        raise ApiError(f'limit must be between 1 and {settings.API_MAX_PAGE_SIZE}.')
+    return int(raw)
+
+
+def _serialize(row, fields, available):
+    item = {}
+    for name in fields:
+        value = row[available[name]]
+        if name == 'image':
+            value = default_storage.url(value) if value else None
+        item[name] = value
+    return item
+
+
+async def _page(request, qs, keys, fields, available, per_page):
+    """One cursor page of ``qs`` as ``{"results": [...], "next": url}``."""
+    columns = {available[name] for name in fields} | {key.lstrip('-') for key in keys}
+    page = await apaginate_keyset(qs.values(*columns), keys, request.GET.get('cursor'), _limit(request, per_page))
+    next_url = None
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+    return _json({
+        'results': [_serialize(row, fields, available) for row in page],
+        'next': next_url,
+    })
+
+
+# ---------------------------------------------------------------- validators
+
+async def _recipe_list_validators(request):
+    qs, _, _ = browse_queryset(request.GET)
+    last = (await qs.aaggregate(last=Max('updated_at')))['last']
+    # Saves and deletes bump the catalog version; likes and ratings touch updated_at
+    return make_etag(request.get_full_path(), last, await aget_version(CATALOG)), last
+
+
+async def _recipe_validators(request, slug):
+    state = await Recipe.objects.filter(slug=slug, approved=True).values_list(
+        'updated_at', 'author_id', 'author__username',
+    ).afirst()
+    if state is None:
+        return None
+    updated_at, author_id, author = state
+    # The payload names the category and author; renames don't touch updated_at
+    etag = make_etag(request.get_full_path(), updated_at, author_id, author, await aget_version(CATALOG))
+    return etag, updated_at
+
+
+async def _comments_validators(request, slug):
+    state = await Recipe.objects.filter(slug=slug, approved=True).annotate(
+        last=Max('comments__created_at'), count=Count('comments'),
+    ).values('last', 'count').afirst()
+    if state is None:
+        return None
+    return make_etag(request.get_full_path(), state['last'], state['count']), state['last']
+
+
+async def _categories_validators(request):
+    return make_etag(request.get_full_path(), await aget_version(CATALOG)), None
+
+
+# --------------------------------------------------------------------- views
+
+@require_safe
+@api_view
+@conditional(_recipe_list_validators)
+async def recipe_list(request):
+    """Approved recipes; accepts the browse page's category/q/have/sort filters."""
+    fields = _fields(request, RECIPE_FIELDS, RECIPE_LIST_DEFAULT)
+    qs, keys, _ = browse_queryset(request.GET)
+    return await _page(request, qs, keys, fields, RECIPE_FIELDS, settings.RECIPES_PER_PAGE)
+
+
+@require_safe
+@api_view
+@conditional(_recipe_validators)
+async def recipe_detail(request, slug):
+    fields = _fields(request, RECIPE_FIELDS)
+    row = await Recipe.objects.filter(slug=slug, approved=True).values(
+        *{RECIPE_FIELDS[name] for name in fields}
+    ).afirst()
+    if row is None:
+        raise Http404
+    return _json(_serialize(row, fields, RECIPE_FIELDS))
+
+
+@require_safe
+@api_view
+@conditional(_comments_validators)
+async def recipe_comments(request, slug):
+    fields = _fields(request, COMMENT_FIELDS)
+    recipe_id = await Recipe.objects.filter(slug=slug, approved=True).values_list('id', flat=True).afirst()
+    if recipe_id is None:
+        raise Http404
+    qs = Comment.objects.filter(recipe_id=recipe_id)
+    return await _page(request, qs, ('-created_at', '-id'), fields, COMMENT_FIELDS, settings.COMMENTS_PER_PAGE)
+
+
+@require_safe
+@api_view
+@conditional(_categories_validators)
+async def category_list(request):
+    fields = _fields(request, CATEGORY_FIELDS)
+    rows = Category.objects.order_by('name').values(*{CATEGORY_FIELDS[name] for name in fields})
+    return _json({'results': [_serialize(row, fields, CATEGORY_FIELDS) async for row in rows]})
@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from .db import BooleanExact, apply_pragmas
+        from .metrics import install_query_timer
+        from .search import check_delete_trigger, ensure_delete_trigger
+        connection_created.connect(apply_pragmas, dispatch_uid='recipes.apply_pragmas')
+        connection_created.connect(install_query_timer, dispatch_uid='recipes.install_query_timer')
+        post_migrate.connect(ensure_delete_trigger, sender=self, dispatch_uid='recipes.ensure_delete_trigger')
+        checks.register(check_delete_trigger, checks.Tags.database)
+        # Only the flags that lead an index; other apps' booleans keep Django's SQL
+        Recipe = self.get_model('Recipe')
+        SystemErrorLog = self.get_model('SystemErrorLog')
+        for field in (Recipe._meta.get_field('approved'), Recipe._meta.get_field('rejected'),
+                      SystemErrorLog._meta.get_field('resolved')):
+            field.register_lookup(BooleanExact)
@@ -0,0 +1,76 @@
+"""Authentication backend that loads the session user from the cache.
+
+``AuthenticationMiddleware`` resolves ``request.user`` through the backend's
+``get_user()`` on every request. ``CachedModelBackend`` keeps a compact
+snapshot of the user row and its ``UserProfile`` under ``user:<pk>`` and
+rebuilds model instances from it (``request.user.profile`` included), so a
+logged-in page view needs no ``auth_user`` query. Together with a cache-backed
+``SESSION_ENGINE`` the steady state is zero session/user queries.
+
+Snapshots are dropped by the ``User``/``UserProfile`` save and delete signals
+in ``models.py``; a password change therefore still invalidates other
+sessions through the session auth hash.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+
+def _cache_key(user_id):
+    return f'user:{user_id}'
+
+
+def _fields(instance):
+    return {field.attname: getattr(instance, field.attname) for field in instance._meta.concrete_fields}
+
+
+def snapshot(user):
+    """Picklable ``{'user': {...}, 'profile': {...} or None}`` for ``user``."""
+    profile = getattr(user, 'profile', None)
+    return {'user': _fields(user), 'profile': _fields(profile) if profile is not None else None}
+
+
+def restore(data):
+    """``User`` (with ``.profile`` attached) rebuilt from a ``snapshot()``."""
+    from .models import UserProfile
+
+    user = User.from_db(DEFAULT_DB_ALIAS, list(data['user']), list(data['user'].values()))
+    if data['profile'] is not None:
+        user.profile = UserProfile.from_db(DEFAULT_DB_ALIAS, list(data['profile']), list(data['profile'].values()))
+    return user
+
+
+def _queryset():
+    return User._default_manager.select_related('profile')
+
+
+def forget(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` whose ``get_user()`` is served from the cache."""
+
+    def get_user(self, user_id):
+        data = cache.get(_cache_key(user_id))
+        if data is None:
+            user = _queryset().filter(pk=user_id).first()
+            if user is None:
+                return None
+            data = snapshot(user)
+            cache.set(_cache_key(user_id), data, settings.USER_CACHE_TIMEOUT)
+        user = restore(data)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        data = await cache.aget(_cache_key(user_id))
+        if data is None:
+            user = await _queryset().filter(pk=user_id).afirst()
+            if user is None:
+                return None
+            data = snapshot(user)
+            await cache.aset(_cache_key(user_id), data, settings.USER_CACHE_TIMEOUT)
+        user = restore(data)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,85 @@
+"""Versioned query-result cache.
+
+Results are stored under ``qc:<namespace>:v<version>:<name>``. Writers never
+delete keys; they bump the namespace version (see the ``Recipe``/``Category``
+signals in ``models.py``), which makes every older key unreachable at once.
+Stale entries simply age out of the backend.
+
+With the default locmem backend versions are per process; use the ``file``
+or ``database`` backend (``DELICIOUS_CACHE_BACKEND``) when running several
+workers so a bump is seen by all of them.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+CATALOG = 'catalog'
+
+_MISSING = object()
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _version_key(namespace):
+    return f'qc:{namespace}:version'
+
+
+def get_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, None)
+        version = cache.get(_version_key(namespace), 1)
+    return version
+
+
+async def aget_version(namespace):
+    version = await cache.aget(_version_key(namespace))
+    if version is None:
+        await cache.aadd(_version_key(namespace), 1, None)
+        version = await cache.aget(_version_key(namespace), 1)
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate everything cached under ``namespace``."""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # Key was never set (or was evicted): any fresh version invalidates.
+        cache.set(_version_key(namespace), get_version(namespace) + 1, None)
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+async def acached_query(namespace, name, queryset, timeout=None):
+    """The rows of ``queryset`` as a list, cached until ``namespace`` is bumped.
+
+    ``queryset`` is only evaluated on a miss.
+    """
+    key = f'qc:{namespace}:v{await aget_version(namespace)}:{name}'
+    value = await cache.aget(key, _MISSING)
+    if value is not _MISSING:
+        _record('hits')
+        return value
+
+    _record('misses')
+    value = [obj async for obj in queryset]
+    if timeout is None:
+        timeout = settings.QUERY_CACHE_TIMEOUT
+    await cache.aset(key, value, timeout)
+    return value
+
+
+def stats():
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 3) if total else 0.0,
+    }
@@ -0,0 +1,113 @@
+"""Conditional GET support (ETag / Last-Modified / 304) and page cache headers.
+
+Django's ``@condition`` calls separate ETag and Last-Modified functions.
+``@conditional`` takes one ``validators(request, *args, **kwargs)`` callable
+returning ``(etag, last_modified)``, so both come out of a single aggregate
+query. When the client's copy is current the view never runs.
+
+``@page_cache_policy`` sets ``Cache-Control``/``Vary`` for HTML pages whose
+content depends on who is logged in.
+
+Both decorators wrap sync and ``async def`` views alike; ``validators``
+may be either kind too.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Quoted ETag built from any printable ``parts``."""
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode(), usedforsecurity=False)
+    return quote_etag(digest.hexdigest())
+
+
+def _precondition(request, result):
+    """``(304/412 response or None, etag, timestamp)`` for a validators result."""
+    etag, last_modified = result
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp), etag, timestamp
+
+
+def _set_validators(response, etag, timestamp):
+    if response.status_code in (200, 304):
+        if etag and not response.has_header('ETag'):
+            response.headers['ETag'] = etag
+        if timestamp and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+def _same_kind(view, ainner):
+    """Return ``ainner`` for an async ``view``, a sync adapter otherwise.
+
+    The decorators below are written once, as coroutines; sync views are
+    run through ``sync_to_async`` inside them and the result is driven with
+    ``async_to_sync``, so the decorated view keeps the caller's calling
+    convention.
+    """
+    if iscoroutinefunction(view):
+        return wraps(view)(ainner)
+
+    @wraps(view)
+    def inner(request, *args, **kwargs):
+        return async_to_sync(ainner)(request, *args, **kwargs)
+    return inner
+
+
+def _as_async(func):
+    return func if iscoroutinefunction(func) else sync_to_async(func)
+
+
+def conditional(validators):
+    avalidators = _as_async(validators)
+
+    def decorator(view):
+        aview = _as_async(view)
+
+        async def ainner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await aview(request, *args, **kwargs)
+
+            # None means "no validators" (e.g. the object doesn't exist):
+            # let the view produce its own response.
+            result = await avalidators(request, *args, **kwargs)
+            if result is None:
+                return await aview(request, *args, **kwargs)
+            response, etag, timestamp = _precondition(request, result)
+            if response is None:
+                response = await aview(request, *args, **kwargs)
+            return _set_validators(response, etag, timestamp)
+        return _same_kind(view, ainner)
+    return decorator
+
+
+def _apply_page_policy(request, user, response):
+    if request.method not in ('GET', 'HEAD') or response.status_code not in (200, 304):
+        return response
+    patch_vary_headers(response, ('Cookie',))
+    if user.is_authenticated or request.META.get('CSRF_COOKIE_USED') or response.cookies:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.ANONYMOUS_PAGE_MAX_AGE)
+    return response
+
+
+def page_cache_policy(view):
+    """Shared caches may keep anonymous pages briefly; per-user pages are private.
+
+    Logged-in (or CSRF-bearing) responses are ``private, no-cache``: the
+    browser keeps them but revalidates every time, which the validators
+    turn into cheap 304s. ``Vary: Cookie`` keeps the two kinds apart.
+    """
+    aview = _as_async(view)
+
+    async def ainner(request, *args, **kwargs):
+        response = await aview(request, *args, **kwargs)
+        return _apply_page_policy(request, await request.auser(), response)
+    return _same_kind(view, ainner)
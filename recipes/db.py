@@ -0,0 +1,38 @@
+"""SQLite connection tuning.
+
+``apply_pragmas`` is connected to ``connection_created`` (see
+``RecipesConfig.ready``) and runs the active profile's ``SQLITE_PRAGMAS`` on
+every new connection; with ``CONN_MAX_AGE`` that is once per worker
+connection, not once per request.
+
+``BooleanExact`` (registered in ``RecipesConfig.ready`` too, on the boolean
+fields that lead an index) makes ``filter(flag=True)`` indexable on SQLite.
+"""
+from django.conf import settings
+from django.db.models.lookups import Exact
+
+
+def pragma_statements(pragmas):
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
+
+
+class BooleanExact(Exact):
+    """``exact`` lookup that compiles booleans to ``"flag" = %s`` on SQLite.
+
+    Django turns ``filter(flag=True)`` into a bare ``WHERE "flag"`` (and
+    ``False`` into ``NOT "flag"``). SQLite never seeks an index on such a
+    term, so an index led by the boolean column could only be scanned. The
+    MySQL backend compares with ``=`` for the same reason.
+    """
+
+    def as_sqlite(self, compiler, connection):
+        return super(Exact, self).as_sql(compiler, connection)
@@ -0,0 +1,171 @@
+"""Background writer for ``SystemErrorLog``.
+
+``ErrorLoggingMiddleware`` only fingerprints the exception and puts a small
+record on a bounded in-memory queue; a daemon thread drains it in batches.
+Repeats of an unresolved error (same fingerprint, path and method) bump
+``occurrences``/``last_seen`` on the existing row (keeping the latest
+message) instead of inserting a new one,
+and each record is also counted in its row's ``ErrorHourlyCount`` bucket,
+which the dashboard rates read. When the queue is full the record is
+dropped and counted - logging must never block a request. A batch the
+database rejects is counted as ``failed`` and logged.
+"""
+import atexit
+import hashlib
+import logging
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(exc_type, exc_traceback):
+    """Stable hash of the exception type and where it was raised."""
+    parts = [f'{exc_type.__module__}.{exc_type.__qualname__}']
+    for frame in traceback.extract_tb(exc_traceback):
+        parts.append(f'{frame.filename}:{frame.name}:{frame.lineno}')
+    return hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+
+
+class ErrorLogWriter:
+    def __init__(self, maxsize, batch_size, flush_interval):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, record):
+        """Queue one error record; returns False if it had to be dropped."""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is written (used at exit)."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='error-log-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception:
+                # The writer must survive DB hiccups; the batch is lost, but not silently
+                with self._lock:
+                    self.failed += len(batch)
+                logger.exception('Error log writer dropped a batch of %d records', len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+                close_old_connections()
+
+    def _write(self, batch):
+        from .models import ErrorHourlyCount, SystemErrorLog
+
+        grouped = OrderedDict()
+        for record in batch:
+            key = (record['fingerprint'], record['path'], record['method'])
+            group = grouped.setdefault(key, {'record': record, 'count': 0, 'hours': {}})
+            group['count'] += 1
+            group['last_seen'] = record['last_seen']
+            group['error_message'] = record['error_message']
+            hour = record['last_seen'].replace(minute=0, second=0, microsecond=0)
+            group['hours'][hour] = group['hours'].get(hour, 0) + 1
+
+        with transaction.atomic():
+            for (fp, path, method), group in grouped.items():
+                error_id = SystemErrorLog.objects.filter(
+                    resolved=False, fingerprint=fp, path=path, method=method,
+                ).values_list('id', flat=True).first()
+                if error_id is None:
+                    fields = dict(group['record'], occurrences=group['count'], last_seen=group['last_seen'])
+                    error_id = SystemErrorLog.objects.create(**fields).pk
+                else:
+                    SystemErrorLog.objects.filter(pk=error_id).update(
+                        occurrences=F('occurrences') + group['count'],
+                        last_seen=group['last_seen'],
+                        error_message=group['error_message'],
+                    )
+                for hour, count in group['hours'].items():
+                    buckets = ErrorHourlyCount.objects.filter(error_id=error_id, hour=hour)
+                    if not buckets.update(count=F('count') + count):
+                        ErrorHourlyCount.objects.create(error_id=error_id, hour=hour, count=count)
+
+        with self._lock:
+            self.written += len(batch)
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ErrorLogWriter(
+                    maxsize=settings.ERROR_LOG_QUEUE_SIZE,
+                    batch_size=settings.ERROR_LOG_BATCH_SIZE,
+                    flush_interval=settings.ERROR_LOG_FLUSH_INTERVAL,
+                )
+                atexit.register(_writer.flush)
+    return _writer
+
+
+def log_exception(request, exc_type, exc_value, exc_traceback, status_code=500):
+    user = getattr(request, 'user', None)
+    return get_writer().submit({
+        'fingerprint': fingerprint(exc_type, exc_traceback),
+        'user_id': user.pk if user is not None and user.is_authenticated else None,
+        'path': request.path[:255],
+        'method': request.method,
+        'error_message': str(exc_value),
+        'traceback': ''.join(traceback.format_exception(exc_type, exc_value, exc_traceback)),
+        'status_code': status_code,
+        'last_seen': timezone.now(),
+    })
@@ -0,0 +1,133 @@
+"""Streaming CSV/JSONL exports of the catalog for staff.
+
+Rows are read with ``values_list().iterator(chunk_size=...)`` and encoded one
+at a time, so memory stays flat however large the table is. Used by the
+``export_dataset`` view and ``manage.py export``. Under ASGI the view streams
+``astream_rows`` instead: Django buffers a sync iterator there.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Comment, Feedback, Rating, Recipe
+
+# name -> (model, columns, date column, path from the model to its recipe or None)
+DATASETS = {
+    'recipes': (Recipe, (
+        'id', 'title', 'slug', 'author__username', 'category__slug', 'approved',
+        'like_count', 'rating_count', 'avg_rating', 'short_description', 'ingredients', 'steps',
+        'created_at', 'updated_at',
+    ), 'created_at', ''),
+    'ratings': (Rating, (
+        'id', 'recipe_id', 'recipe__slug', 'user__username', 'score',
+    ), 'recipe__created_at', 'recipe__'),
+    'comments': (Comment, (
+        'id', 'recipe_id', 'recipe__slug', 'user__username', 'content', 'created_at',
+    ), 'created_at', 'recipe__'),
+    'feedback': (Feedback, (
+        'id', 'user__username', 'message', 'created_at',
+    ), 'created_at', None),
+}
+FORMATS = ('csv', 'jsonl')
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _day_bound(value, end=False):
+    day = parse_date(value)
+    if day is None:
+        raise ExportError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+    moment = timezone.make_aware(datetime.combine(day, time.min))
+    return moment + timedelta(days=1) if end else moment
+
+
+def build_queryset(dataset, approved=None, category=None, since=None, until=None):
+    """Filtered, ordered queryset for ``dataset``.
+
+    ``approved``/``category`` apply through the related recipe and are
+    ignored for datasets without one; ``since``/``until`` are inclusive
+    YYYY-MM-DD days.
+    """
+    if dataset not in DATASETS:
+        raise ExportError(f"Unknown dataset '{dataset}'.")
+    model, columns, date_field, recipe_path = DATASETS[dataset]
+    qs = model.objects.all()
+
+    if recipe_path is not None:
+        if approved is not None:
+            qs = qs.filter(**{f'{recipe_path}approved': approved})
+        if category:
+            qs = qs.filter(**{f'{recipe_path}category__slug': category})
+    if since:
+        qs = qs.filter(**{f'{date_field}__gte': _day_bound(since)})
+    if until:
+        qs = qs.filter(**{f'{date_field}__lt': _day_bound(until, end=True)})
+    return qs.order_by('id').values_list(*columns)
+
+
+def parse_approved(value):
+    if value in (None, ''):
+        return None
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise ExportError(f"Invalid approved filter '{value}'.")
+
+
+class _Echo:
+    """File-like object whose write() just hands back the line."""
+
+    def write(self, value):
+        return value
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _encoder(dataset, fmt):
+    """``(header lines, row -> line)`` for ``dataset`` in ``fmt``."""
+    columns = DATASETS[dataset][1]
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        return [writer.writerow(columns)], lambda row: writer.writerow([_serialize(v) for v in row])
+    return [], lambda row: json.dumps(dict(zip(columns, map(_serialize, row))), ensure_ascii=False) + '\n'
+
+
+def stream_rows(dataset, qs, fmt):
+    """Yield the export line by line (header first for CSV)."""
+    header, encode = _encoder(dataset, fmt)
+    yield from header
+    for row in qs.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield encode(row)
+
+
+def _next_chunk(rows):
+    return list(islice(rows, settings.EXPORT_CHUNK_SIZE))
+
+
+async def astream_rows(dataset, qs, fmt):
+    """``stream_rows`` for ASGI: an async iterator, so the response isn't buffered.
+
+    Chunks come from the same sync iterator on the thread-sensitive executor
+    (``aiterator()`` opens the cursor on the event loop for
+    ``values_list()`` querysets).
+    """
+    header, encode = _encoder(dataset, fmt)
+    for line in header:
+        yield line
+    rows = qs.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    while chunk := await sync_to_async(_next_chunk)(rows):
+        for row in chunk:
+            yield encode(row)
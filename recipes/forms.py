@@ -2,7 +2,7 @@ from django import forms
 from .models import Recipe, Comment, Rating, Feedback, UserProfile, DeveloperInviteCode
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from django.utils.text import slugify
+from . import usernames
 
 
 class RecipeForm(forms.ModelForm):
@@ -57,27 +57,10 @@ class RegisterForm(UserCreationForm):
         self.fields['password1'].widget.attrs.update({'class': 'form-control password-field'})
         self.fields['password2'].widget.attrs.update({'class': 'form-control password-field'})
 
-    def _suggest_usernames(self, base, max_suggestions=3):
-        """Generate available username suggestions based on `base`."""
-        suggestions = []
-        candidate = base
-        suffix = 1
-        # normalize base
-        base_slug = slugify(base).replace('-', '') or base
-        while len(suggestions) < max_suggestions:
-            if suffix == 1:
-                candidate = base_slug
-            else:
-                candidate = f"{base_slug}{suffix}"
-            if not User.objects.filter(username__iexact=candidate).exists():
-                suggestions.append(candidate)
-            suffix += 1
-        return suggestions
-
     def clean_username(self):
         username = self.cleaned_data.get('username')
-        if username and User.objects.filter(username__iexact=username).exists():
-            suggestions = self._suggest_usernames(username)
+        if username and usernames.is_taken(username):
+            suggestions = usernames.suggest(username)
             raise forms.ValidationError(
                 f"Username '{username}' is already taken. Suggestions: {', '.join(suggestions)}"
             )
@@ -127,29 +110,12 @@ class UserInfoForm(forms.ModelForm):
             'last_name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Last name'}),
         }
 
-    def _suggest_usernames(self, base, max_suggestions=3):
-        suggestions = []
-        candidate = base
-        suffix = 1
-        base_slug = slugify(base).replace('-', '') or base
-        while len(suggestions) < max_suggestions:
-            if suffix == 1:
-                candidate = base_slug
-            else:
-                candidate = f"{base_slug}{suffix}"
-            # exclude current instance from check
-            if not User.objects.filter(username__iexact=candidate).exclude(pk=self.instance.pk).exists():
-                suggestions.append(candidate)
-            suffix += 1
-        return suggestions
-
     def clean_username(self):
         username = self.cleaned_data.get('username')
         if username:
             # Check if another user has this username
-            qs = User.objects.filter(username__iexact=username).exclude(pk=self.instance.pk)
-            if qs.exists():
-                suggestions = self._suggest_usernames(username)
+            if usernames.is_taken(username, exclude_pk=self.instance.pk):
+                suggestions = usernames.suggest(username, exclude_pk=self.instance.pk)
                 raise forms.ValidationError(
                     f"Username '{username}' is already taken. Suggestions: {', '.join(suggestions)}"
                 )
@@ -0,0 +1,92 @@
+"""Fixed-size image variants for recipe photos and profile pictures.
+
+Each uploaded image ``<dir>/<name>.<ext>`` gets one WebP and one JPEG file per
+entry in ``settings.IMAGE_VARIANTS``, stored as
+``<dir>/variants/<name>.<ext>.<variant>.<webp|jpg>``. Variants are re-encoded
+from scratch, so EXIF/GPS and other metadata are dropped (orientation is
+applied to the pixels first).
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+FORMATS = (
+    ('webp', 'WEBP'),
+    ('jpg', 'JPEG'),
+)
+
+
+def variant_name(name, variant, ext):
+    # The whole file name, extension included: pasta.jpg and pasta.png
+    # may sit side by side in the same upload directory
+    directory, filename = os.path.split(name)
+    return os.path.join(directory, 'variants', f'{filename}.{variant}.{ext}')
+
+
+def has_variants(fieldfile):
+    if not fieldfile:
+        return False
+    first = next(iter(settings.IMAGE_VARIANTS))
+    return fieldfile.storage.exists(variant_name(fieldfile.name, first, 'jpg'))
+
+
+def _resize(image, width, height, mode):
+    if mode == 'crop':
+        return ImageOps.fit(image, (width, height), Image.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail((width, height), Image.LANCZOS)
+    return resized
+
+
+def _encode(image, pil_format):
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG has no alpha channel: flatten onto white
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode in ('RGBA', 'LA'):
+            background.paste(image, mask=image.getchannel('A'))
+        else:
+            background.paste(image.convert('RGB'))
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, pil_format, quality=settings.IMAGE_VARIANT_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_variants(fieldfile, force=False):
+    """Write every variant of ``fieldfile``; returns the number of files written."""
+    if not fieldfile or (not force and has_variants(fieldfile)):
+        return 0
+
+    storage = fieldfile.storage
+    with storage.open(fieldfile.name, 'rb') as fh:
+        image = Image.open(fh)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+
+    written = 0
+    for variant, (width, height, mode) in settings.IMAGE_VARIANTS.items():
+        resized = _resize(image, width, height, mode)
+        for ext, pil_format in FORMATS:
+            name = variant_name(fieldfile.name, variant, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(_encode(resized, pil_format)))
+            written += 1
+    return written
+
+
+def variant_url(fieldfile, variant, ext):
+    return fieldfile.storage.url(variant_name(fieldfile.name, variant, ext))
+
+
+def variant_srcset(fieldfile, variants, ext):
+    """``srcset`` value (``"<url> <width>w, ..."``) for the given variants."""
+    return ', '.join(
+        f'{variant_url(fieldfile, variant, ext)} {settings.IMAGE_VARIANTS[variant][0]}w'
+        for variant in variants
+    )
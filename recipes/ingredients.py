@@ -0,0 +1,146 @@
+"""Ingredient inverted index and "what can I cook" matching.
+
+``Recipe.ingredients`` is free text, one ingredient per line. ``parse()``
+turns each line into a normalized name ("2 large Tomatoes, diced" ->
+"tomato") and the names are stored one row per recipe in
+``RecipeIngredient``. Rows are rewritten from the ``Recipe`` save signal in
+``models.py``; ``manage.py rebuild_ingredient_index`` repopulates them.
+
+``match_recipes()`` ranks recipes by how much of their ingredient list the
+user already has, computed from the index in SQL.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+NAME_MAX_LENGTH = 100
+
+UNITS = {
+    'g', 'gram', 'grams', 'kg', 'mg', 'ml', 'l', 'litre', 'liter', 'cl', 'dl', 'oz', 'ounce', 'lb', 'lbs',
+    'pound', 'cup', 'cups', 'tbsp', 'tbs', 'tablespoon', 'tsp', 'teaspoon', 'pinch', 'dash', 'handful',
+    'clove', 'cloves', 'slice', 'can', 'tin', 'packet', 'pack', 'bunch', 'sprig', 'stick', 'piece', 'pcs',
+    'inch', 'cm', 'drop', 'quart', 'pint', 'jar', 'bottle', 'bag', 'box', 'head', 'stalk', 'leaf',
+}
+DESCRIPTORS = {
+    'fresh', 'freshly', 'dried', 'chopped', 'finely', 'roughly', 'coarsely', 'diced', 'minced', 'sliced',
+    'grated', 'shredded', 'crushed', 'ground', 'peeled', 'large', 'small', 'medium', 'big', 'ripe',
+    'boneless', 'skinless', 'cooked', 'uncooked', 'raw', 'frozen', 'thawed', 'softened', 'melted',
+    'beaten', 'whole', 'halved', 'quartered', 'cubed', 'heaped', 'level', 'about', 'approx', 'extra',
+    'optional', 'taste', 'needed', 'required', 'some', 'few', 'of', 'and', 'or', 'to', 'a', 'an', 'the',
+    'for', 'as', 'plus', 'more', 'into', 'cut', 'pieces', 'thinly', 'thickly', 'warm', 'cold', 'hot',
+}
+
+_WORD_RE = re.compile(r'[^\W\d_]+', re.UNICODE)
+_PARENS_RE = re.compile(r'\([^)]*\)')
+
+
+def _singular(word):
+    if len(word) <= 3 or word.endswith(('ss', 'us', 'is')):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'ches', 'shes', 'xes')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+def normalize(text):
+    """Normalized ingredient name for one line or one user-typed item ('' if nothing is left)."""
+    # Preparation notes follow a comma or sit in parentheses
+    text = _PARENS_RE.sub(' ', text.lower()).split(',')[0]
+    words = [
+        _singular(word) for word in _WORD_RE.findall(text)
+        # isalpha() also drops vulgar fractions such as "½"
+        if word.isalpha() and word not in UNITS and word not in DESCRIPTORS
+    ]
+    return ' '.join(words)[:NAME_MAX_LENGTH].strip()
+
+
+def parse(text):
+    """Distinct normalized names from an ingredient list, in order."""
+    names = (normalize(line) for line in (text or '').splitlines())
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def parse_pantry(value):
+    """Names from the comma- or newline-separated "I have..." input."""
+    return list(dict.fromkeys(name for name in map(normalize, re.split(r'[,\n;]', value or '')) if name))
+
+
+def index_recipe(recipe):
+    """Rewrite the index rows and ``ingredient_count`` of one saved recipe."""
+    from .models import Recipe, RecipeIngredient
+
+    names = parse(recipe.ingredients)
+    if set(RecipeIngredient.objects.filter(recipe=recipe).values_list('name', flat=True)) == set(names):
+        return
+    with transaction.atomic():
+        RecipeIngredient.objects.filter(recipe=recipe).delete()
+        RecipeIngredient.objects.bulk_create(RecipeIngredient(recipe=recipe, name=name) for name in names)
+        Recipe.objects.filter(pk=recipe.pk).update(ingredient_count=len(names))
+    recipe.ingredient_count = len(names)
+
+
+def index_recipes(recipes):
+    """Bulk variant of index_recipe() for freshly inserted rows (bulk_create).
+
+    The recipes' ``ingredient_count`` must already be set from ``parse()``.
+    """
+    from .models import RecipeIngredient
+
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe_id=recipe.pk, name=name)
+        for recipe in recipes for name in parse(recipe.ingredients)
+    )
+
+
+def rebuild_index(batch_size=1000):
+    """Repopulate the whole index from ``Recipe.ingredients``; returns row count."""
+    from .models import Recipe, RecipeIngredient
+
+    rows = 0
+    with transaction.atomic():
+        RecipeIngredient.objects.all().delete()
+        recipes = Recipe.objects.only('pk', 'ingredients', 'ingredient_count').order_by('pk')
+        batch = []
+        for recipe in recipes.iterator(chunk_size=batch_size):
+            recipe.ingredient_count = len(parse(recipe.ingredients))
+            batch.append(recipe)
+            if len(batch) == batch_size:
+                rows += _flush(batch)
+                batch = []
+        rows += _flush(batch)
+    return rows
+
+
+def _flush(recipes):
+    from .models import Recipe
+
+    Recipe.objects.bulk_update(recipes, ['ingredient_count'])
+    index_recipes(recipes)
+    return sum(recipe.ingredient_count for recipe in recipes)
+
+
+def match_recipes(qs, names):
+    """Recipes in ``qs`` using any of ``names``, best coverage first.
+
+    Annotates ``matched`` (how many of the recipe's ingredients are in
+    ``names``) and ``coverage`` (matched / ingredient_count). Candidates
+    come from the ``(name, recipe)`` index; each count is a correlated
+    subquery on the ``(recipe, name)`` unique index.
+    """
+    from .models import RecipeIngredient
+
+    if not names:
+        return qs.none()
+    hits = RecipeIngredient.objects.filter(name__in=names)
+    matched = hits.filter(recipe=OuterRef('pk')).order_by().values('recipe').annotate(n=Count('*')).values('n')
+    return qs.filter(id__in=hits.values('recipe_id')).annotate(
+        matched=Subquery(matched, output_field=IntegerField()),
+    ).annotate(
+        coverage=Cast(F('matched'), FloatField()) / F('ingredient_count'),
+    )
@@ -0,0 +1,142 @@
+"""Small database-backed job queue.
+
+Functions decorated with ``@job`` can be queued with ``enqueue()`` and are
+run by ``manage.py runworker``: ``cpu`` jobs in a process pool, ``io`` jobs
+in a thread pool. A worker claims a job by stamping it with a claim token
+and a ``locked_until`` deadline (the visibility timeout); if the worker dies
+the deadline passes and another worker picks the job up again, unless that
+was its last attempt (then it is marked failed). Failed attempts are retried
+with exponential backoff up to ``max_attempts``.
+A job already queued or running with the same name and arguments is not
+queued again.
+
+Without a running worker queued jobs just accumulate; set
+``JOBS_RUN_INLINE`` to run them right after the request's commit instead.
+"""
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CPU = 'cpu'
+IO = 'io'
+
+_registry = {}
+
+
+def job(name, kind=IO, priority=0, max_attempts=3):
+    """Register a function as a job under ``name``."""
+    def decorator(func):
+        _registry[name] = {'func': func, 'kind': kind, 'priority': priority, 'max_attempts': max_attempts}
+        return func
+    return decorator
+
+
+def get_job(name):
+    if name not in _registry:
+        # Job functions register themselves when their module is imported
+        from . import tasks  # noqa: F401
+    return _registry[name]
+
+
+def enqueue(name, *args, priority=None, delay=0):
+    """Queue ``name(*args)`` once the current transaction commits."""
+    from .models import Job
+
+    spec = get_job(name)
+    if settings.JOBS_RUN_INLINE:
+        transaction.on_commit(lambda: spec['func'](*args))
+        return None
+
+    new_job = Job(
+        name=name,
+        args=list(args),
+        kind=spec['kind'],
+        priority=spec['priority'] if priority is None else priority,
+        max_attempts=spec['max_attempts'],
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+    def save_unless_pending():
+        # e.g. every save of a recipe whose variants are not generated yet
+        pending = Job.objects.filter(name=name, args=new_job.args, status__in=[Job.QUEUED, Job.RUNNING])
+        if not pending.exists():
+            new_job.save()
+
+    transaction.on_commit(save_unless_pending)
+    return new_job
+
+
+def claim(kind, limit, visibility_timeout):
+    """Atomically claim up to ``limit`` runnable jobs of ``kind``."""
+    from .models import Job
+
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    expired = Q(status=Job.RUNNING, locked_until__lt=now)
+    runnable = (
+        Q(status=Job.QUEUED, run_after__lte=now) |
+        (expired & Q(attempts__lt=F('max_attempts')))
+    )
+    token = uuid.uuid4().hex
+    with transaction.atomic():
+        # A job whose worker died on every attempt (e.g. it crashes the
+        # process) must not be reclaimed forever
+        lost = Job.objects.filter(expired, kind=kind, attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED, last_error='Worker lost: lease expired on the last attempt.', locked_until=None,
+        )
+        if lost:
+            logger.error('%d %s job(s) failed permanently after their worker was lost', lost, kind)
+        ids = list(
+            Job.objects.filter(runnable, kind=kind)
+            .order_by('-priority', 'run_after', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        # Re-check the condition so a concurrent worker cannot claim the same rows
+        Job.objects.filter(runnable, id__in=ids).update(
+            status=Job.RUNNING,
+            claim_token=token,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+            attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(claim_token=token, status=Job.RUNNING))
+
+
+def execute(name, args):
+    """Entry point inside the worker pools."""
+    return get_job(name)['func'](*args)
+
+
+def complete(claimed, error=None):
+    """Record the outcome of a claimed job."""
+    from .models import Job
+
+    mine = Job.objects.filter(pk=claimed.pk, claim_token=claimed.claim_token)
+    if error is None:
+        mine.delete()
+        return
+    if claimed.attempts >= claimed.max_attempts:
+        mine.update(status=Job.FAILED, last_error=error, locked_until=None)
+        logger.error('Job %s (%s) failed permanently', claimed.pk, claimed.name)
+        return
+    backoff = settings.JOBS_RETRY_BACKOFF * 2 ** (claimed.attempts - 1)
+    mine.update(
+        status=Job.QUEUED,
+        last_error=error,
+        locked_until=None,
+        run_after=timezone.now() + timedelta(seconds=backoff),
+    )
+
+
+def format_error(exc):
+    return ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__))
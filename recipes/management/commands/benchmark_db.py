@@ -0,0 +1,175 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.db import pragma_statements
+
+SCHEMA = """
+CREATE TABLE recipe (id INTEGER PRIMARY KEY, title TEXT, like_count INTEGER NOT NULL DEFAULT 0,
+                     updated_at REAL NOT NULL);
+CREATE TABLE comment (id INTEGER PRIMARY KEY, recipe_id INTEGER NOT NULL, content TEXT, created_at REAL NOT NULL);
+CREATE INDEX comment_recipe_created_idx ON comment (recipe_id, created_at);
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare SQLite read/write throughput under concurrent load for each DB_PROFILES entry. '
+        'Runs against throwaway database files, never the configured database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', default=list(settings.DB_PROFILES), help='Profiles to compare.')
+        parser.add_argument('--readers', type=int, default=8, help='Concurrent reader threads.')
+        parser.add_argument('--writers', type=int, default=2, help='Concurrent writer threads.')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each run.')
+        parser.add_argument('--recipes', type=int, default=2000, help='Recipes in the seeded database.')
+
+    def handle(self, *args, **options):
+        unknown = set(options['profiles']) - set(settings.DB_PROFILES)
+        if unknown:
+            raise CommandError(f"Unknown profile(s): {', '.join(sorted(unknown))}.")
+
+        results = {}
+        for name in options['profiles']:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                self._seed(path, options['recipes'])
+                results[name] = _Run(path, settings.DB_PROFILES[name], options).start()
+            self._report(name, results[name], options['seconds'])
+
+        if 'default' in results and len(results) > 1:
+            base = results['default']
+            for name, result in results.items():
+                if name != 'default':
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{name} vs default: reads x{_ratio(result['reads'], base['reads'])}, "
+                        f"writes x{_ratio(result['writes'], base['writes'])}"
+                    ))
+
+    def _seed(self, path, recipes):
+        db = sqlite3.connect(path)
+        db.executescript(SCHEMA)
+        now = time.time()
+        db.executemany(
+            'INSERT INTO recipe (id, title, updated_at) VALUES (?, ?, ?)',
+            ((pk, f'Recipe {pk}', now) for pk in range(1, recipes + 1)),
+        )
+        db.executemany(
+            'INSERT INTO comment (recipe_id, content, created_at) VALUES (?, ?, ?)',
+            ((random.randint(1, recipes), 'Lovely.', now - i) for i in range(recipes * 10)),
+        )
+        db.commit()
+        db.close()
+
+    def _report(self, name, result, seconds):
+        self.stdout.write(
+            f"{name:<12} reads/s {result['reads'] / seconds:>9.0f}   "
+            f"writes/s {result['writes'] / seconds:>7.0f}   "
+            f"locked {result['locked']:>5}   "
+            f"read p99 {_p99(result['read_latency']):>7.2f} ms   "
+            f"write p99 {_p99(result['write_latency']):>7.2f} ms"
+        )
+
+
+class _Run:
+    """One timed run of reader and writer threads against ``path``.
+
+    Mirrors how Django would talk to the database under ``profile``: a new
+    connection per request unless ``CONN_MAX_AGE`` keeps it, the profile's
+    pragmas on every new connection, and its ``transaction_mode`` for writes.
+    Writers read before they write, like the like/rate views do.
+    """
+
+    def __init__(self, path, profile, options):
+        database = profile['DATABASE']
+        self.path = path
+        self.pragmas = pragma_statements(profile['PRAGMAS'])
+        self.persistent = bool(database.get('CONN_MAX_AGE'))
+        self.begin = f"BEGIN {database.get('OPTIONS', {}).get('transaction_mode', 'DEFERRED')}"
+        self.options = options
+        self.lock = threading.Lock()
+        self.result = {'reads': 0, 'writes': 0, 'locked': 0, 'read_latency': [], 'write_latency': []}
+
+    def start(self):
+        self.deadline = time.monotonic() + self.options['seconds']
+        threads = [threading.Thread(target=self._worker, args=(self._read,)) for _ in range(self.options['readers'])]
+        threads += [threading.Thread(target=self._worker, args=(self._write,)) for _ in range(self.options['writers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.result
+
+    def _connect(self):
+        # Django's SQLite backend defaults to a 5 second busy timeout
+        db = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        for statement in self.pragmas:
+            db.execute(statement)
+        return db
+
+    def _worker(self, operation):
+        rng = random.Random()
+        db = self._connect() if self.persistent else None
+        while time.monotonic() < self.deadline:
+            conn = db or self._connect()
+            started = time.perf_counter()
+            try:
+                kind = operation(conn, rng)
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    raise
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                with self.lock:
+                    self.result['locked'] += 1
+            else:
+                elapsed = (time.perf_counter() - started) * 1000
+                with self.lock:
+                    self.result[f'{kind}s'] += 1
+                    self.result[f'{kind}_latency'].append(elapsed)
+            finally:
+                if conn is not db:
+                    conn.close()
+        if db is not None:
+            db.close()
+
+    def _read(self, conn, rng):
+        recipe_id = rng.randint(1, self.options['recipes'])
+        conn.execute('SELECT id, title, like_count FROM recipe WHERE id = ?', (recipe_id,)).fetchone()
+        conn.execute(
+            'SELECT id, content, created_at FROM comment WHERE recipe_id = ? ORDER BY created_at DESC LIMIT 20',
+            (recipe_id,),
+        ).fetchall()
+        return 'read'
+
+    def _write(self, conn, rng):
+        recipe_id = rng.randint(1, self.options['recipes'])
+        conn.execute(self.begin)
+        conn.execute('SELECT like_count FROM recipe WHERE id = ?', (recipe_id,)).fetchone()
+        conn.execute(
+            'INSERT INTO comment (recipe_id, content, created_at) VALUES (?, ?, ?)',
+            (recipe_id, 'Benchmark comment.', time.time()),
+        )
+        conn.execute(
+            'UPDATE recipe SET like_count = like_count + 1, updated_at = ? WHERE id = ?', (time.time(), recipe_id),
+        )
+        conn.execute('COMMIT')
+        return 'write'
+
+
+def _p99(samples):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def _ratio(value, base):
+    return f'{value / base:.1f}' if base else 'inf'
@@ -0,0 +1,169 @@
+import asyncio
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests/sec and latency of the WSGI and ASGI entry points by driving both '
+        'handlers in-process with GET requests against the configured database. The same number '
+        'of clients loop over the paths in both runs; latency includes time queued for a worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='Paths to request (default: the main read pages and API).')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per run.')
+        parser.add_argument('--threads', type=int, default=1,
+                            help='WSGI worker threads (1 = a classic sync worker).')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients.')
+        parser.add_argument('--host', default='localhost', help='Host header to send.')
+        parser.add_argument('--page-cache', action='store_true',
+                            help='Keep the anonymous page cache on (by default views are measured).')
+
+    def handle(self, *args, **options):
+        if not options['page_cache']:
+            settings.PAGE_CACHE_URL_NAMES = ()
+        paths = options['paths'] or self._default_paths()
+        requests = [paths[i % len(paths)] for i in range(options['requests'])]
+        self.stdout.write(
+            f"{len(requests)} requests from {options['concurrency']} clients over {', '.join(paths)}"
+        )
+
+        wsgi = self._run_wsgi(requests, options['concurrency'], options['threads'], options['host'])
+        self._report(f"WSGI ({options['threads']} thread{'s' if options['threads'] > 1 else ''})", wsgi)
+        asgi = asyncio.run(self._run_asgi(requests, options['concurrency'], options['host']))
+        self._report('ASGI (1 event loop)', asgi)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"ASGI vs WSGI: x{asgi['rps'] / wsgi['rps']:.2f} requests/sec, "
+            f"p99 {asgi['p99']:.1f} ms vs {wsgi['p99']:.1f} ms"
+        ))
+
+    def _default_paths(self):
+        paths = ['/', '/recipes/', '/api/v1/recipes/', '/api/v1/categories/']
+        slug = Recipe.objects.filter(approved=True).order_by('-created_at').values_list('slug', flat=True).first()
+        if slug:
+            paths += [f'/recipes/{slug}/', f'/api/v1/recipes/{slug}/']
+        return paths
+
+    def _run_wsgi(self, requests, concurrency, threads, host):
+        application = WSGIHandler()
+
+        def call(url):
+            path = urlsplit(url)
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path.path, 'QUERY_STRING': path.query,
+                'SERVER_NAME': host, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': host,
+                'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+                'wsgi.errors': sys.stderr, 'wsgi.multithread': threads > 1, 'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            status = []
+            result = application(environ, lambda s, headers, exc_info=None: status.append(int(s[:3])))
+            try:
+                b''.join(result)
+            finally:
+                # Fires request_finished, which closes the DB connection
+                result.close()
+            return status[0]
+
+        pending = iter(requests)
+        lock = threading.Lock()
+        results = []
+
+        def client(pool):
+            while True:
+                with lock:
+                    url = next(pending, None)
+                if url is None:
+                    return
+                started = time.perf_counter()
+                status = pool.submit(call, url).result()
+                with lock:
+                    results.append((status, (time.perf_counter() - started) * 1000))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            clients = [threading.Thread(target=client, args=(pool,)) for _ in range(concurrency)]
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+        return _summary(results, time.perf_counter() - started)
+
+    async def _run_asgi(self, requests, concurrency, host):
+        application = ASGIHandler()
+
+        async def call(url):
+            path = urlsplit(url)
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': path.path, 'raw_path': path.path.encode(),
+                'query_string': path.query.encode(), 'root_path': '', 'headers': [(b'host', host.encode())],
+                'client': ('127.0.0.1', 50000), 'server': (host, 80),
+            }
+            done = asyncio.Event()
+            status = []
+            body_sent = False
+
+            async def receive():
+                nonlocal body_sent
+                if not body_sent:
+                    body_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # The handler listens for a disconnect while the view runs
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif not message.get('more_body'):
+                    done.set()
+
+            await application(scope, receive, send)
+            return status[0]
+
+        pending = iter(requests)
+        results = []
+
+        async def client():
+            for url in pending:
+                started = time.perf_counter()
+                status = await call(url)
+                results.append((status, (time.perf_counter() - started) * 1000))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return _summary(results, time.perf_counter() - started)
+
+    def _report(self, label, summary):
+        self.stdout.write(
+            f"{label:<24} {summary['rps']:>8.1f} req/s   p50 {summary['p50']:>7.1f} ms   "
+            f"p99 {summary['p99']:>7.1f} ms   errors {summary['errors']}"
+        )
+
+
+def _percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+
+def _summary(results, elapsed):
+    latencies = sorted(latency for _, latency in results)
+    return {
+        'rps': len(results) / elapsed,
+        'p50': _percentile(latencies, 0.50),
+        'p99': _percentile(latencies, 0.99),
+        'errors': sum(1 for status, _ in results if status >= 400),
+    }
@@ -0,0 +1,130 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Category, Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the main views through the test client: latency percentiles and queries per '
+        'request. Run `manage.py seed` first. --save writes a baseline; --baseline compares against '
+        'one and fails on regressions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Measured requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per scenario.')
+        parser.add_argument('--host', default='localhost', help='Host header to send.')
+        parser.add_argument('--page-cache', action='store_true',
+                            help='Keep the anonymous page cache on (by default views are measured).')
+        parser.add_argument('--save', metavar='PATH', help='Write the results as a JSON baseline.')
+        parser.add_argument('--baseline', metavar='PATH',
+                            help='Compare against a saved baseline (benchmarks/views.json is the committed one).')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed p95 slowdown against the baseline (0.25 = 25%%).')
+
+    def handle(self, *args, **options):
+        if not options['page_cache']:
+            settings.PAGE_CACHE_URL_NAMES = ()
+        scenarios = self._scenarios()
+
+        results = {}
+        self.stdout.write(f"{'scenario':<22} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  queries")
+        for name, (urls, user) in scenarios.items():
+            results[name] = self._measure(urls, user, options)
+            self._report(name, results[name])
+
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as fh:
+                json.dump(results, fh, indent=2, sort_keys=True)
+                fh.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['save']}."))
+        if options['baseline']:
+            self._compare(results, options['baseline'], options['tolerance'])
+
+    def _scenarios(self):
+        recipes = Recipe.objects.filter(approved=True)
+        slugs = list(recipes.order_by('-like_count', '-id').values_list('slug', flat=True)[:20])
+        category = Category.objects.filter(recipe__approved=True).values_list('slug', flat=True).first()
+        staff = User.objects.filter(is_staff=True, is_active=True).first()
+        if not slugs or category is None or staff is None:
+            raise CommandError('Needs approved recipes, a category and a staff user; run `manage.py seed`.')
+        return {
+            'home': (['/'], None),
+            'recipe_list': (['/recipes/'], None),
+            'recipe_list_search': (['/recipes/?q=chicken', '/recipes/?q=garlic+soup', '/recipes/?q=cake'], None),
+            'recipe_list_category': ([f'/recipes/?category={category}'], None),
+            'recipe_detail': ([f'/recipes/{slug}/' for slug in slugs], None),
+            'recipe_detail_staff': ([f'/recipes/{slug}/' for slug in slugs], staff),
+            'admin_dashboard': (['/dashboard/'], staff),
+        }
+
+    def _measure(self, urls, user, options):
+        client = Client(HTTP_HOST=options['host'])
+        if user is not None:
+            client.force_login(user)
+        for i in range(options['warmup']):
+            client.get(urls[i % len(urls)])
+
+        latencies, queries = [], []
+        for i in range(options['iterations']):
+            url = urls[i % len(urls)]
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}.')
+            queries.append(len(captured))
+
+        latencies.sort()
+        return {
+            'p50': round(_percentile(latencies, 0.50), 2),
+            'p95': round(_percentile(latencies, 0.95), 2),
+            'p99': round(_percentile(latencies, 0.99), 2),
+            'max': round(latencies[-1], 2),
+            'queries': max(queries),
+            'queries_median': statistics.median(queries),
+        }
+
+    def _report(self, name, result):
+        self.stdout.write(
+            f"{name:<22} {result['p50']:>8.2f} {result['p95']:>8.2f} {result['p99']:>8.2f} {result['max']:>8.2f}  "
+            f"{result['queries_median']:g} (max {result['queries']})"
+        )
+
+    def _compare(self, results, path, tolerance):
+        try:
+            with open(path, encoding='utf-8') as fh:
+                baseline = json.load(fh)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Cannot read baseline {path}: {exc}')
+
+        regressions = []
+        for name, result in results.items():
+            base = baseline.get(name)
+            if base is None:
+                self.stdout.write(f'{name}: not in baseline')
+                continue
+            if result['queries'] > base['queries']:
+                regressions.append(f"{name}: {result['queries']} queries (baseline {base['queries']})")
+            if result['p95'] > base['p95'] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {result['p95']:.2f} ms (baseline {base['p95']:.2f} ms)")
+
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            raise CommandError(f'{len(regressions)} regressions against {path}.')
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}.'))
+
+
+def _percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
@@ -0,0 +1,129 @@
+import re
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Category, Recipe, SystemErrorLog
+
+# Lookup tables that are always read whole; scanning them is the plan
+SMALL_TABLES = {'recipes_category'}
+
+# Pages that list a whole table by design: the dashboard pages through every
+# user and feedback row (and counts them for its pager)
+PAGE_TABLES = {'/dashboard/': {'auth_user', 'recipes_feedback'}}
+
+_SCAN_RE = re.compile(r'^SCAN (\S+)(.*)$')
+
+
+def full_scans(plan):
+    """Table names the ``EXPLAIN QUERY PLAN`` rows in ``plan`` read in full.
+
+    Only ``SEARCH`` rows seek; ``SCAN ... USING [COVERING] INDEX`` still
+    walks the whole index and counts as a scan. Scans of materialized
+    subqueries and constant rows are fine (their inner plans are checked
+    row by row), as are FTS ``VIRTUAL TABLE INDEX`` lookups.
+    """
+    tables = []
+    for row in plan:
+        match = _SCAN_RE.match(row[-1])
+        if match is None:
+            continue
+        name, detail = match.groups()
+        if name == 'CONSTANT' or name.startswith(('subquery', '(subquery')) or 'VIRTUAL TABLE INDEX' in detail:
+            continue
+        tables.append(name)
+    return tables
+
+
+def explain_selects(queries, allowed=frozenset()):
+    """``(sql, plan, scanned tables)`` for each SELECT in captured ``queries``.
+
+    Tables in ``allowed`` are left out of the scanned list.
+    """
+    results = []
+    for query in queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        with connection.cursor() as cursor:
+            plan = cursor.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+        results.append((sql, plan, [table for table in full_scans(plan) if table not in allowed]))
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        'Request the hot pages as an anonymous visitor and as staff, run EXPLAIN QUERY PLAN on '
+        'every SELECT they issue and fail if one scans a whole table or index. Changes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='localhost', help='Host header to send.')
+        parser.add_argument('--allow', nargs='*', default=[], help='Extra tables allowed to be scanned.')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not just failures.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('explain_views reads SQLite query plans.')
+        # Measure the views, not the page cache
+        settings.PAGE_CACHE_URL_NAMES = ()
+        allowed = SMALL_TABLES | set(options['allow'])
+
+        failures = 0
+        with transaction.atomic():
+            client = Client(HTTP_HOST=options['host'])
+            for url in self._public_urls():
+                failures += self._check(client, 'anon', url, allowed, options['verbose_plans'])
+            staff = User.objects.filter(is_staff=True, is_active=True).first()
+            if staff is None:
+                self.stdout.write(self.style.WARNING('No staff user; skipping the staff pages.'))
+            else:
+                client.force_login(staff)
+                for url in self._staff_urls() + self._public_urls():
+                    failures += self._check(client, 'staff', url, allowed, options['verbose_plans'])
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f'{failures} queries do full table or index scans.')
+        self.stdout.write(self.style.SUCCESS('No full table or index scans.'))
+
+    def _public_urls(self):
+        urls = [
+            '/', '/recipes/', '/recipes/?sort=popular', '/recipes/?sort=top_rated',
+            '/recipes/?q=chicken', '/recipes/?have=egg,rice', '/api/v1/recipes/', '/api/v1/categories/',
+            '/register/check-username/?username=admin',
+        ]
+        category = Category.objects.values_list('slug', flat=True).first()
+        if category:
+            urls += [f'/recipes/?category={category}', f'/api/v1/recipes/?category={category}']
+        slug = Recipe.objects.filter(approved=True).values_list('slug', flat=True).first()
+        if slug:
+            urls += [f'/recipes/{slug}/', f'/recipes/{slug}/comments/', f'/api/v1/recipes/{slug}/',
+                     f'/api/v1/recipes/{slug}/comments/']
+        return urls
+
+    def _staff_urls(self):
+        urls = ['/dashboard/', '/dev/errors/', '/dev/errors/?resolved=true', '/dev/metrics/summary/', '/profile/']
+        error_id = SystemErrorLog.objects.values_list('id', flat=True).first()
+        if error_id:
+            urls.append(f'/dev/errors/{error_id}/trace/')
+        return urls
+
+    def _check(self, client, who, url, allowed, verbose):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        results = explain_selects(queries, allowed | PAGE_TABLES.get(url.partition('?')[0], set()))
+        self.stdout.write(f'{who:<5} {url} -> {response.status_code}, {len(results)} SELECTs')
+        failures = 0
+        for sql, plan, scanned in results:
+            if scanned or verbose:
+                style = self.style.ERROR if scanned else str
+                self.stdout.write(style(f"    {'SCAN ' + ', '.join(scanned) if scanned else 'ok'}: {sql[:200]}"))
+                for row in plan:
+                    self.stdout.write(f'        {row[-1]}')
+            failures += bool(scanned)
+        return failures
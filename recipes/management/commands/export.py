@@ -0,0 +1,38 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import exports
+
+
+class Command(BaseCommand):
+    help = 'Stream recipes, ratings, comments or feedback as CSV/JSONL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('--format', choices=exports.FORMATS, default='csv')
+        parser.add_argument('--approved', help='true/false: filter on the (related) recipe approval state.')
+        parser.add_argument('--category', help='Category slug of the (related) recipe.')
+        parser.add_argument('--since', help='YYYY-MM-DD, inclusive.')
+        parser.add_argument('--until', help='YYYY-MM-DD, inclusive.')
+        parser.add_argument('--output', '-o', help='File to write; defaults to stdout.')
+
+    def handle(self, *args, **options):
+        try:
+            qs = exports.build_queryset(
+                options['dataset'],
+                approved=exports.parse_approved(options['approved']),
+                category=options['category'],
+                since=options['since'],
+                until=options['until'],
+            )
+        except exports.ExportError as exc:
+            raise CommandError(str(exc))
+
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for line in exports.stream_rows(options['dataset'], qs, options['format']):
+                out.write(line)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from recipes import images
+from recipes.models import Recipe, UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Generate resized image variants for existing recipe and profile images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate variants that already exist.')
+
+    def handle(self, *args, **options):
+        sources = [
+            (Recipe.objects.exclude(image='').exclude(image=None), 'image'),
+            (UserProfile.objects.exclude(profile_image='').exclude(profile_image=None), 'profile_image'),
+        ]
+        seen = set()
+        written = failed = 0
+        for qs, field in sources:
+            for obj in qs.only('pk', field).iterator():
+                fieldfile = getattr(obj, field)
+                # Many profiles share the default picture
+                if fieldfile.name in seen:
+                    continue
+                seen.add(fieldfile.name)
+                try:
+                    written += images.generate_variants(fieldfile, force=options['force'])
+                except (OSError, ValueError) as exc:
+                    failed += 1
+                    self.stderr.write(f'Skipping {fieldfile.name}: {exc}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {len(seen)} images, wrote {written} variant files, {failed} failed.'
+        ))
@@ -0,0 +1,135 @@
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+
+from recipes import caching, ingredients, search
+from recipes.models import Category, Recipe, base_slug, next_free_slug
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import recipes from a JSONL or CSV file. Each record may have: title, '
+        'short_description, ingredients, steps, category (name or slug), author (username), '
+        'approved.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--author', help='Username to use when a record has no (known) author.')
+        parser.add_argument('--approved', action='store_true', help='Mark every imported recipe approved.')
+        parser.add_argument('--create-categories', action='store_true', help='Create unknown categories.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('csv' if options['path'].endswith('.csv') else 'jsonl')
+
+        # Everything we need to resolve references is loaded once up front
+        self.users = dict(User.objects.values_list('username', 'id').iterator())
+        self.categories = {}
+        for pk, name, slug in Category.objects.values_list('id', 'name', 'slug').iterator():
+            self.categories[slug] = pk
+            self.categories[name.lower()] = pk
+        self.taken_slugs = set(Recipe.objects.values_list('slug', flat=True).iterator())
+        self.slug_length = Recipe._meta.get_field('slug').max_length
+        self.slug_counters = {}
+
+        self.default_author = None
+        if options['author']:
+            if options['author'] not in self.users:
+                raise CommandError(f"Unknown author '{options['author']}'.")
+            self.default_author = self.users[options['author']]
+
+        imported = skipped = 0
+        self.malformed = 0
+        with open(options['path'], newline='', encoding='utf-8') as fh:
+            records = csv.DictReader(fh) if fmt == 'csv' else self._jsonl(fh)
+            while True:
+                chunk = list(islice(records, options['batch_size']))
+                if not chunk:
+                    break
+                recipes = []
+                for record in chunk:
+                    recipe = self._build(record, options)
+                    if recipe is None:
+                        skipped += 1
+                    else:
+                        recipes.append(recipe)
+                with transaction.atomic():
+                    # bulk_create skips save()/signals, so index explicitly
+                    created = Recipe.objects.bulk_create(recipes)
+                    search.index_recipes(created)
+                    ingredients.index_recipes(created)
+                imported += len(created)
+                self.stdout.write(f'  {imported} imported...')
+
+        caching.bump_version(caching.CATALOG)
+        skipped += self.malformed
+        self.stdout.write(self.style.SUCCESS(f'Imported {imported} recipes, skipped {skipped}.'))
+
+    def _jsonl(self, fh):
+        for number, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                record = exc
+            if not isinstance(record, dict):
+                self.malformed += 1
+                reason = record if isinstance(record, json.JSONDecodeError) else 'not a JSON object'
+                self.stderr.write(self.style.WARNING(f'Line {number}: skipped, {reason}.'))
+                continue
+            yield record
+
+    def _build(self, record, options):
+        title = (record.get('title') or '').strip()
+        author_id = self.users.get(record.get('author') or '', self.default_author)
+        if not title or author_id is None:
+            return None
+
+        ingredient_text = record.get('ingredients') or ''
+        return Recipe(
+            title=title,
+            slug=self._allocate_slug(title),
+            author_id=author_id,
+            category_id=self._category(record.get('category'), options['create_categories']),
+            short_description=record.get('short_description') or '',
+            ingredients=ingredient_text,
+            ingredient_count=len(ingredients.parse(ingredient_text)),
+            steps=record.get('steps') or '',
+            approved=options['approved'] or str(record.get('approved', '')).lower() in TRUE_VALUES,
+        )
+
+    def _allocate_slug(self, title):
+        base = base_slug(title, self.slug_length)
+        # Resume each base's suffix search where it last stopped so popular
+        # titles don't rescan -1, -2, ... for every record.
+        counter = self.slug_counters.get(base)
+        if counter is None:
+            slug = next_free_slug(base, self.taken_slugs)
+        else:
+            while f'{base}-{counter}' in self.taken_slugs:
+                counter += 1
+            slug = f'{base}-{counter}'
+        self.slug_counters[base] = int(slug.rsplit('-', 1)[1]) + 1 if slug != base else 1
+        self.taken_slugs.add(slug)
+        return slug
+
+    def _category(self, value, create):
+        if not value:
+            return None
+        key = value.strip()
+        pk = self.categories.get(key.lower()) or self.categories.get(slugify(key))
+        if pk is None and create:
+            category = Category.objects.create(name=key)
+            pk = category.pk
+            self.categories[category.slug] = self.categories[key.lower()] = pk
+        return pk
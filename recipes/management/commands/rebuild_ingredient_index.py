@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from recipes import ingredients
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the ingredient inverted index from every recipe\'s ingredient list.'
+
+    def handle(self, *args, **options):
+        rows = ingredients.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {rows} recipe ingredients.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text recipe search index from the recipes table.'
+
+    def handle(self, *args, **options):
+        if not search.fts_available():
+            raise CommandError('Full-text search index requires SQLite (FTS5).')
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} recipes.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from recipes.models import Rating, Recipe, recipe_stats_from_source
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored like/rating counters on recipes and repair any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report drifted recipes.')
+
+    def handle(self, *args, **options):
+        stats = recipe_stats_from_source(Recipe.likes.through, Rating)
+        actual = {f'actual_{name}': expr for name, expr in stats.items()}
+
+        drift = Q()
+        for name in stats:
+            drift |= ~Q(**{name: F(f'actual_{name}')})
+        drifted = Recipe.objects.annotate(**actual).filter(drift).values_list('pk', flat=True)
+        drifted_ids = list(drifted)
+
+        if not drifted_ids:
+            self.stdout.write(self.style.SUCCESS('All recipe counters are in sync.'))
+            return
+        if options['dry_run']:
+            self.stdout.write(f'{len(drifted_ids)} recipes have drifted counters.')
+            return
+
+        updated = Recipe.objects.filter(pk__in=drifted_ids).update(**stats)
+        self.stdout.write(self.style.SUCCESS(f'Repaired counters on {updated} recipes.'))
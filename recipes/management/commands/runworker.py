@@ -0,0 +1,99 @@
+import multiprocessing
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipes import jobs
+
+
+def _init_process():
+    # Children are spawned (not forked) so they never share the parent's
+    # database connection; they only need Django configured.
+    import django
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs: CPU jobs in a process pool, I/O jobs in a thread pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help='Process pool size for CPU-bound jobs.')
+        parser.add_argument('--threads', type=int, default=4, help='Thread pool size for I/O-bound jobs.')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--visibility-timeout', type=int, default=settings.JOBS_VISIBILITY_TIMEOUT)
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained.')
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        close_old_connections()
+        pools = {
+            jobs.CPU: (self._process_pool(options['processes']), options['processes']),
+            jobs.IO: (ThreadPoolExecutor(options['threads']), options['threads']),
+        }
+        inflight = {}
+        done_count = failed_count = 0
+
+        self.stdout.write(f"Worker started ({options['processes']} processes, {options['threads']} threads)")
+        try:
+            while self.running:
+                for kind, (pool, size) in pools.items():
+                    busy = sum(1 for claimed in inflight.values() if claimed.kind == kind)
+                    for claimed in jobs.claim(kind, size - busy, options['visibility_timeout']):
+                        try:
+                            future = pool.submit(jobs.execute, claimed.name, claimed.args)
+                        except BrokenProcessPool:
+                            pool = self._replace_process_pool(pools, options['processes'])
+                            future = pool.submit(jobs.execute, claimed.name, claimed.args)
+                        inflight[future] = claimed
+
+                if not inflight:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+
+                finished, _ = wait(inflight, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                broken = False
+                for future in finished:
+                    claimed = inflight.pop(future)
+                    exc = future.exception()
+                    # A child process died: every job it was running fails
+                    # this attempt (and is retried while attempts remain)
+                    broken = broken or isinstance(exc, BrokenProcessPool)
+                    jobs.complete(claimed, jobs.format_error(exc) if exc else None)
+                    if exc:
+                        failed_count += 1
+                    else:
+                        done_count += 1
+                if broken:
+                    self._replace_process_pool(pools, options['processes'])
+        finally:
+            for pool, _ in pools.values():
+                pool.shutdown(wait=True)
+            for future, claimed in inflight.items():
+                exc = future.exception()
+                jobs.complete(claimed, jobs.format_error(exc) if exc else None)
+
+        self.stdout.write(self.style.SUCCESS(f'Worker stopped: {done_count} done, {failed_count} failed.'))
+
+    def _process_pool(self, size):
+        return ProcessPoolExecutor(size, mp_context=multiprocessing.get_context('spawn'), initializer=_init_process)
+
+    def _replace_process_pool(self, pools, size):
+        old_pool, _ = pools[jobs.CPU]
+        old_pool.shutdown(wait=False, cancel_futures=True)
+        self.stderr.write('Process pool broken (a worker process died); starting a new one.')
+        pool = self._process_pool(size)
+        pools[jobs.CPU] = (pool, size)
+        return pool
+
+    def _stop(self, signum, frame):
+        self.running = False
@@ -0,0 +1,188 @@
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+
+from recipes import caching, ingredients, search
+from recipes.models import (
+    Category, Comment, Rating, Recipe, UserProfile, base_slug, next_free_slug, recipe_stats_from_source,
+)
+
+CATEGORY_NAMES = [
+    'Breakfast', 'Soups', 'Salads', 'Curries', 'Pasta', 'Rice Dishes', 'Street Food', 'Grill',
+    'Seafood', 'Vegetarian', 'Vegan', 'Baking', 'Desserts', 'Drinks', 'Snacks', 'Sauces',
+]
+ADJECTIVES = [
+    'Spicy', 'Creamy', 'Smoky', 'Quick', 'Classic', 'Crispy', 'Garlic', 'Lemon', 'Herbed', 'Sweet',
+    'Tangy', 'Roasted', 'Homestyle', 'Golden', 'Zesty', 'Rustic',
+]
+DISHES = [
+    'Chicken Curry', 'Paneer Tikka', 'Vegetable Biryani', 'Tomato Soup', 'Lentil Dal', 'Fried Rice',
+    'Pancakes', 'Chocolate Cake', 'Fish Tacos', 'Pasta Bake', 'Chickpea Salad', 'Mango Lassi',
+    'Egg Fried Noodles', 'Mushroom Risotto', 'Beef Stew', 'Aloo Paratha', 'Banana Bread', 'Pad Thai',
+]
+INGREDIENTS = [
+    'onion', 'garlic', 'tomato', 'ginger', 'chicken', 'paneer', 'rice', 'egg', 'flour', 'butter', 'milk',
+    'sugar', 'salt', 'black pepper', 'cumin', 'turmeric', 'chili powder', 'coriander', 'potato', 'carrot',
+    'pea', 'spinach', 'lemon', 'olive oil', 'yogurt', 'cream', 'cheese', 'mushroom', 'chickpea', 'lentil',
+    'noodle', 'soy sauce', 'honey', 'banana', 'chocolate', 'mango', 'beef', 'fish', 'basil', 'pasta',
+]
+QUANTITIES = ['1', '2', '3', '1/2', '200 g', '1 cup', '2 tbsp', '1 tsp', '500 g', 'a pinch of']
+COMMENTS = [
+    'Turned out great, thanks!', 'A bit too salty for me.', 'My family loved it.', 'Added extra garlic.',
+    'Easy to follow.', 'Will make again this weekend.', 'Needed more time in the oven.', 'Perfect weeknight dinner.',
+]
+# Seeded timestamps spread back from this fixed point, so reruns match
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a reproducible dataset (users, categories, recipes, comments, likes, ratings) with '
+        'bulk inserts. The same --seed on the same database gives the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--likes', type=int, default=20000)
+        parser.add_argument('--ratings', type=int, default=15000)
+        parser.add_argument('--seed', type=int, default=42, help='Random seed.')
+        parser.add_argument('--prefix', default='seed', help='Username prefix of generated users.')
+        parser.add_argument('--password', default='seed-password', help='Password of every generated user.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--clear', action='store_true', help='Delete previously seeded users (and their data) first.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('--users must be at least 1.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        prefix = options['prefix']
+
+        with transaction.atomic():
+            if options['clear']:
+                deleted, _ = User.objects.filter(username__startswith=f'{prefix}_').delete()
+                self.stdout.write(f'Cleared {deleted} seeded rows.')
+            elif User.objects.filter(username__startswith=f'{prefix}_').exists():
+                raise CommandError(f"Users named '{prefix}_*' already exist; use --clear or another --prefix.")
+
+            users = self._users(prefix, options['users'], options['password'])
+            categories = self._categories(options['categories'])
+            recipes = self._recipes(options['recipes'], users, categories)
+            likes = self._pairs(Recipe.likes.through, options['likes'], recipes, users, lambda r, u: {})
+            ratings = self._pairs(Rating, options['ratings'], recipes, users,
+                                  lambda r, u: {'score': self.rng.choices(range(1, 6), (1, 1, 3, 5, 4))[0]})
+            comments = self._comments(options['comments'], recipes, users)
+            # Counters from the rows just written, as reconcile_recipe_stats does
+            Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes]).update(
+                **recipe_stats_from_source(Recipe.likes.through, Rating)
+            )
+
+        caching.bump_version(caching.CATALOG)
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(users)} users ({users[0].username} is staff), {len(categories)} categories, '
+            f'{len(recipes)} recipes, {comments} comments, {likes} likes, {ratings} ratings.'
+        ))
+
+    def _when(self, days_back=365, after=None):
+        moment = EPOCH - timedelta(seconds=self.rng.randrange(days_back * 86400))
+        return max(moment, after) + timedelta(seconds=self.rng.randrange(1, 3600)) if after else moment
+
+    def _users(self, prefix, count, password):
+        password = make_password(password)
+        users = [
+            User(
+                username=f'{prefix}_user{i:05d}', email=f'{prefix}_user{i:05d}@example.com',
+                password=password, date_joined=self._when(), is_staff=i == 0,
+            )
+            for i in range(count)
+        ]
+        users[0].username = f'{prefix}_staff'
+        users = User.objects.bulk_create(users, batch_size=self.batch_size)
+        # bulk_create skips the post_save signal that creates profiles
+        UserProfile.objects.bulk_create((UserProfile(user=user) for user in users), batch_size=self.batch_size)
+        return users
+
+    def _categories(self, count):
+        names = [CATEGORY_NAMES[i] if i < len(CATEGORY_NAMES) else f'Category {i + 1}' for i in range(count)]
+        existing = {category.slug: category for category in Category.objects.filter(slug__in=map(slugify, names))}
+        missing = [Category(name=name, slug=slugify(name)) for name in names if slugify(name) not in existing]
+        return list(existing.values()) + Category.objects.bulk_create(missing)
+
+    def _recipe(self, users, categories, taken, slug_length):
+        title = f'{self.rng.choice(ADJECTIVES)} {self.rng.choice(DISHES)}'
+        slug = next_free_slug(base_slug(title, slug_length), taken)
+        taken.add(slug)
+        lines = [
+            f'{self.rng.choice(QUANTITIES)} {name}'
+            for name in self.rng.sample(INGREDIENTS, self.rng.randint(4, 12))
+        ]
+        state = self.rng.random()
+        created = self._when()
+        return Recipe(
+            title=title, slug=slug,
+            author_id=self.rng.choice(users).pk,
+            category_id=self.rng.choice(categories).pk if categories else None,
+            short_description=f'A {title.lower()} that is ready in {self.rng.randrange(15, 120, 5)} minutes.',
+            ingredients='\n'.join(lines),
+            ingredient_count=len(ingredients.parse('\n'.join(lines))),
+            steps='\n'.join(f'Step {n}: prepare and cook.' for n in range(1, self.rng.randint(3, 8))),
+            approved=state < 0.9, rejected=0.9 <= state < 0.95,
+            created_at=created, updated_at=created,
+        )
+
+    def _recipes(self, count, users, categories):
+        taken = set(Recipe.objects.values_list('slug', flat=True).iterator())
+        slug_length = Recipe._meta.get_field('slug').max_length
+        recipes = []
+        for start in range(0, count, self.batch_size):
+            batch = [
+                self._recipe(users, categories, taken, slug_length)
+                for _ in range(min(self.batch_size, count - start))
+            ]
+            stamps = [(recipe.created_at, recipe.updated_at) for recipe in batch]
+            created = Recipe.objects.bulk_create(batch)
+            # auto_now(_add) overwrote the timestamps on insert
+            for recipe, (created_at, updated_at) in zip(created, stamps):
+                recipe.created_at, recipe.updated_at = created_at, updated_at
+            Recipe.objects.bulk_update(created, ['created_at', 'updated_at'])
+            # bulk_create skips save()/signals, so index explicitly
+            search.index_recipes(created)
+            ingredients.index_recipes(created)
+            recipes += created
+        return recipes
+
+    def _pairs(self, model, count, recipes, users, extra):
+        """Insert ``count`` distinct (recipe, user) rows of ``model``; returns how many."""
+        count = min(count, len(recipes) * len(users))
+        seen = set()
+        rows = []
+        while len(seen) < count:
+            pair = (self.rng.choice(recipes).pk, self.rng.choice(users).pk)
+            if pair not in seen:
+                seen.add(pair)
+                rows.append(model(recipe_id=pair[0], user_id=pair[1], **extra(*pair)))
+        model.objects.bulk_create(rows, batch_size=self.batch_size)
+        return len(rows)
+
+    def _comments(self, count, recipes, users):
+        rows = []
+        for _ in range(count):
+            recipe = self.rng.choice(recipes)
+            rows.append(Comment(
+                recipe_id=recipe.pk, user_id=self.rng.choice(users).pk, content=self.rng.choice(COMMENTS),
+                created_at=self._when(after=recipe.created_at),
+            ))
+        stamps = [comment.created_at for comment in rows]
+        created = Comment.objects.bulk_create(rows, batch_size=self.batch_size)
+        for comment, created_at in zip(created, stamps):
+            comment.created_at = created_at
+        Comment.objects.bulk_update(created, ['created_at'], batch_size=self.batch_size)
+        return len(created)
@@ -0,0 +1,285 @@
+"""In-process request metrics.
+
+``MetricsMiddleware`` opens a ``Measurement`` for each request and keeps it in
+a context variable, so work done for the request on another thread (sync
+views and ORM calls under ASGI run through ``sync_to_async``) is still
+attributed to it:
+
+* DB queries and their time come from an execute wrapper that
+  ``install_query_timer`` adds to every new connection (``connection_created``,
+  see ``RecipesConfig.ready``);
+* template time comes from the ``DjangoTemplates`` backend below, which times
+  each top-level render (queries evaluated lazily inside the template count
+  towards both).
+
+When the response is ready the measurement is added to fixed-bucket
+histograms keyed by the resolved view name. Recording is a few counter
+updates under one lock per request. Histograms are per process; scrape every
+worker (or sum them) when running several.
+
+``scrape_allowed`` lets a Prometheus server fetch the export without a staff
+session (``METRICS_TOKEN`` / ``METRICS_ALLOWED_IPS``).
+"""
+import contextvars
+import hmac
+import ipaddress
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+from django.urls import Resolver404, resolve
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bucket upper bounds; everything above the last one lands in +Inf
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (1000, 5000, 10000, 25000, 50000, 100000, 250000, 1000000)
+
+# (metric name, buckets, help text), in the order they are reported
+HISTOGRAMS = (
+    ('delicious_request_duration_seconds', SECONDS_BUCKETS, 'Wall time from the first middleware to the response.'),
+    ('delicious_request_db_queries', QUERY_BUCKETS, 'Database queries run for the request.'),
+    ('delicious_request_db_duration_seconds', SECONDS_BUCKETS, 'Time spent executing database queries.'),
+    ('delicious_request_template_duration_seconds', SECONDS_BUCKETS, 'Time spent rendering templates.'),
+    ('delicious_response_size_bytes', BYTES_BUCKETS, 'Response body size (non-streaming responses).'),
+)
+
+UNRESOLVED = 'unresolved'
+
+_current = contextvars.ContextVar('delicious_request_metrics', default=None)
+_lock = threading.Lock()
+_views = {}
+
+
+class Measurement:
+    __slots__ = ('started', 'duration', 'queries', 'db_time', 'template_time', 'rendering')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.rendering = False
+
+
+class Histogram:
+    """Prometheus-style histogram; callers hold ``_lock``."""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, fraction):
+        """Estimate from the buckets, interpolating like ``histogram_quantile``."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class _ViewStats:
+    __slots__ = ('histograms', 'statuses')
+
+    def __init__(self):
+        self.histograms = [Histogram(buckets) for _, buckets, _ in HISTOGRAMS]
+        self.statuses = {}
+
+
+def start():
+    """Begin measuring the current request; pass the token to ``stop()``."""
+    return _current.set(Measurement())
+
+
+def stop(token):
+    measurement = _current.get()
+    _current.reset(token)
+    measurement.duration = time.perf_counter() - measurement.started
+    return measurement
+
+
+def view_name(request):
+    match = request.resolver_match
+    if match is None:
+        # Answered before URL resolution (page cache hit, redirect)
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return UNRESOLVED
+    return match.view_name
+
+
+def response_size(response):
+    if not response.streaming:
+        return len(response.content)
+    length = response.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def record(request, response, measurement):
+    name = view_name(request)
+    size = response_size(response)
+    values = (measurement.duration, measurement.queries, measurement.db_time, measurement.template_time, size)
+    with _lock:
+        stats = _views.get(name)
+        if stats is None:
+            stats = _views[name] = _ViewStats()
+        for histogram, value in zip(stats.histograms, values):
+            if value is not None:
+                histogram.observe(value)
+        stats.statuses[response.status_code] = stats.statuses.get(response.status_code, 0) + 1
+
+
+def _time_query(execute, sql, params, many, context):
+    measurement = _current.get()
+    if measurement is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        measurement.queries += 1
+        measurement.db_time += time.perf_counter() - started
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # First in the list: connection.execute_wrapper() pops the last one
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        measurement = _current.get()
+        # Nested renders (render_to_string in a tag) are already being timed
+        if measurement is None or measurement.rendering:
+            return super().render(context, request)
+        measurement.rendering = True
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            measurement.template_time += time.perf_counter() - started
+            measurement.rendering = False
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """The stock Django backend, with render time added to the request's metrics."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+def summary():
+    """Per-view rows for the dashboard, slowest total time first."""
+    rows = []
+    with _lock:
+        for name, stats in _views.items():
+            duration, queries, db_time, template_time, size = stats.histograms
+            requests = duration.count
+            rows.append({
+                'view': name,
+                'requests': requests,
+                'errors': sum(count for status, count in stats.statuses.items() if status >= 500),
+                'total_s': duration.sum,
+                'mean_ms': duration.sum * 1000 / requests,
+                'p50_ms': duration.quantile(0.50) * 1000,
+                'p95_ms': duration.quantile(0.95) * 1000,
+                'queries': queries.sum / requests,
+                'db_ms': db_time.sum * 1000 / requests,
+                'template_ms': template_time.sum * 1000 / requests,
+                'kb': size.sum / size.count / 1000 if size.count else 0.0,
+            })
+    rows.sort(key=lambda row: row['total_s'], reverse=True)
+    return rows
+
+
+def scrape_allowed(request):
+    """Whether ``request`` carries the metrics bearer token or comes from an allowed address."""
+    token = settings.METRICS_TOKEN
+    if token:
+        scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and hmac.compare_digest(credentials.strip().encode(), token.encode()):
+            return True
+    if settings.METRICS_ALLOWED_IPS:
+        try:
+            address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+        except ValueError:
+            return False
+        return any(address in ipaddress.ip_network(network, strict=False) for network in settings.METRICS_ALLOWED_IPS)
+    return False
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def prometheus_text(extra=()):
+    """All histograms in the Prometheus text exposition format.
+
+    ``extra`` is an iterable of ``(name, type, help, value)`` process-wide
+    samples appended after the per-view series.
+    """
+    with _lock:
+        views = [
+            (name, [(list(h.counts), h.sum, h.count) for h in stats.histograms], dict(stats.statuses))
+            for name, stats in sorted(_views.items())
+        ]
+
+    lines = [
+        '# HELP delicious_requests_total Requests answered, by view and status code.',
+        '# TYPE delicious_requests_total counter',
+    ]
+    for name, _, statuses in views:
+        for status, count in sorted(statuses.items()):
+            lines.append(f'delicious_requests_total{_labels(view=name, code=status)} {count}')
+
+    for i, (metric, buckets, help_text) in enumerate(HISTOGRAMS):
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+        for name, histograms, _ in views:
+            counts, total, count = histograms[i]
+            cumulative = 0
+            for bound, bucket in zip(buckets + ('+Inf',), counts):
+                cumulative += bucket
+                lines.append(f'{metric}_bucket{_labels(view=name, le=bound)} {cumulative}')
+            lines.append(f'{metric}_sum{_labels(view=name)} {_number(total)}')
+            lines.append(f'{metric}_count{_labels(view=name)} {count}')
+
+    for metric, kind, help_text, value in extra:
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}', f'{metric} {_number(value)}']
+    return '\n'.join(lines) + '\n'
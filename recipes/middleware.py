@@ -1,45 +1,83 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
 from django.shortcuts import redirect, render
-from .models import SystemErrorLog
-import traceback
+from django.urls import Resolver404, resolve, reverse
+from django.utils.cache import get_conditional_response
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import parse_http_date_safe, urlencode
+from .caching import CATALOG, aget_version
+from .errorlog import log_exception
+from . import metrics
+import time
 import sys
 
-class ErrorLoggingMiddleware:
+# The middleware below works in both sync (WSGI) and async (ASGI) chains, so
+# async views are not pushed back onto a thread by an adapter.
+
+class MetricsMiddleware:
+    """Record wall time, queries, template time and size per view (see metrics.py)."""
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        response = self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = metrics.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            measurement = metrics.stop(token)
+        metrics.record(request, response, measurement)
         return response
 
+    async def __acall__(self, request):
+        token = metrics.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            measurement = metrics.stop(token)
+        metrics.record(request, response, measurement)
+        return response
+
+
+class ErrorLoggingMiddleware(MiddlewareMixin):
     def process_exception(self, request, exception):
-        # Capture raw exception info
-        exc_type, exc_value, exc_traceback = sys.exc_info()
-        tb_str = ''.join(traceback.format_exception(exc_type, exc_value, exc_traceback))
-
-        # Log to DB
-        SystemErrorLog.objects.create(
-            user=request.user if request.user.is_authenticated else None,
-            path=request.path,
-            method=request.method,
-            error_message=str(exception),
-            traceback=tb_str,
-            status_code=500,
-            resolved=False
-        )
+        # 404s and permission errors are handled by Django, not system errors
+        if isinstance(exception, (Http404, PermissionDenied)):
+            return None
+
+        # Fingerprint and hand off to the background writer; never blocks
+        log_exception(request, *sys.exc_info())
 
         # Return friendly warning page
         return render(request, 'warning.html', status=500)
 
 
 class RoleMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        path = request.path
-        
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         # Security: Customers cannot open /admin or /dev/*
-        if path.startswith('/admin/') or path.startswith('/dev/'):
+        if self._is_restricted(request):
             if not request.user.is_authenticated:
                  return redirect('login')
             
@@ -50,3 +88,125 @@ class RoleMiddleware:
 
         response = self.get_response(request)
         return response
+
+    async def __acall__(self, request):
+        if self._is_restricted(request):
+            user = await request.auser()
+            if not user.is_authenticated:
+                return redirect('login')
+            if not user.is_staff:
+                return await sync_to_async(render)(request, '404.html', status=404)
+        return await self.get_response(request)
+
+    def _is_restricted(self, request):
+        if request.path == reverse('metrics_export') and metrics.scrape_allowed(request):
+            # Prometheus scrapes with a token or from an allowed address
+            return False
+        return request.path.startswith('/admin/') or request.path.startswith('/dev/')
+
+
+class AnonymousPageCacheMiddleware:
+    """Full-page cache for anonymous GET/HEAD requests.
+
+    Entries are keyed by path + normalized query string + catalog version, so
+    approving, editing or deleting a recipe (which bumps the version) makes
+    every cached page miss at once. An expired entry is kept for
+    PAGE_CACHE_STALE seconds; while one request rebuilds it (single-flight
+    lock via cache.add) all others are served the stale copy. Cached pages
+    keep their ETag/Last-Modified, so revalidating clients get a 304.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self._aget_response = get_response
+        else:
+            self._aget_response = sync_to_async(get_response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._is_cacheable_route(request):
+            return self.get_response(request)
+        # The single-flight logic lives in __acall__ only
+        return async_to_sync(self.__acall__)(request)
+
+    async def __acall__(self, request):
+        # Checked last: it loads the session, which adds "Vary: Cookie"
+        if not self._is_cacheable_route(request) or (await request.auser()).is_authenticated:
+            return await self._aget_response(request)
+
+        key = self._cache_key(request, await aget_version(CATALOG))
+        entry = await cache.aget(key)
+        now = time.time()
+
+        if entry is not None and entry['fresh_until'] > now:
+            return self._from_cache(request, entry, 'HIT')
+
+        lock_key = f'{key}:lock'
+        if not await cache.aadd(lock_key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+            # Someone else is rebuilding this page
+            if entry is not None:
+                return self._from_cache(request, entry, 'STALE')
+            return await self._aget_response(request)
+
+        try:
+            response = await self._aget_response(request)
+            if self._is_cacheable_response(request, response):
+                response['X-Page-Cache'] = 'MISS'
+                await cache.aset(key, {
+                    'response': response,
+                    'fresh_until': now + settings.PAGE_CACHE_TIMEOUT,
+                }, settings.PAGE_CACHE_TIMEOUT + settings.PAGE_CACHE_STALE)
+            return response
+        finally:
+            await cache.adelete(lock_key)
+
+    def _is_cacheable_route(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        # Pending flash messages must be rendered for this visitor only
+        if 'messages' in request.COOKIES:
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.url_name in settings.PAGE_CACHE_URL_NAMES
+
+    def _is_cacheable_response(self, request, response):
+        if response.status_code != 200 or response.streaming:
+            return False
+        if response.cookies or 'private' in response.get('Cache-Control', ''):
+            return False
+        # Page rendered a CSRF token or queued a message: visitor specific
+        if request.META.get('CSRF_COOKIE_NEEDS_UPDATE') or request.META.get('CSRF_COOKIE_USED'):
+            return False
+        # No "messages" cookie (see _is_cacheable_route), so this never
+        # falls through to the session and is safe on the event loop
+        if len(messages.get_messages(request)):
+            return False
+        return True
+
+    def _cache_key(self, request, version):
+        query = urlencode(sorted(
+            (name, value)
+            for name, values in request.GET.lists()
+            for value in values if value
+        ))
+        # "Load more" requests get a fragment from the same URL
+        fragment = 'xhr' if request.headers.get('x-requested-with') == 'XMLHttpRequest' else 'page'
+        return f'page:v{version}:{request.method}:{fragment}:{request.path}?{query}'
+
+    def _from_cache(self, request, entry, status):
+        response = get_conditional_response(
+            request,
+            etag=entry['response'].get('ETag'),
+            last_modified=parse_http_date_safe(entry['response'].get('Last-Modified', '')),
+            response=entry['response'],
+        )
+        response['X-Page-Cache'] = status
+        return response
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Frozen copy of the schema in recipes/search.py at the time of this
+# migration; later changes there must come with a new migration.
+FTS_TABLE = 'recipes_recipe_fts'
+FTS_COLUMNS = ('title', 'short_description', 'ingredients')
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    columns = ', '.join(FTS_COLUMNS)
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    Recipe = apps.get_model('recipes', 'Recipe')
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, {columns}) "
+        f"SELECT id, {columns} FROM {Recipe._meta.db_table}"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_developerinvitecode_systemerrorlog'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
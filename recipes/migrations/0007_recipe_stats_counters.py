@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:44
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+
+def backfill_counters(apps, schema_editor):
+    # Frozen copy of models.recipe_stats_from_source()/rounded_average()
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Rating = apps.get_model('recipes', 'Rating')
+
+    def scalar(model, aggregate):
+        return Coalesce(
+            Subquery(model.objects.filter(recipe_id=OuterRef('pk')).values('recipe_id')
+                     .annotate(v=aggregate).values('v')),
+            Value(0),
+        )
+
+    rating_sum = scalar(Rating, Sum('score'))
+    rating_count = scalar(Rating, Count('id'))
+    Recipe.objects.update(
+        like_count=scalar(Recipe.likes.through, Count('id')),
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        avg_rating=Coalesce(
+            Round(Cast(rating_sum, models.FloatField()) / NullIf(rating_count, 0), 1),
+            Value(0.0),
+            output_field=models.FloatField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='avg_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
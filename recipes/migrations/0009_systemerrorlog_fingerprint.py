@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_to_last_seen(apps, schema_editor):
+    SystemErrorLog = apps.get_model('recipes', 'SystemErrorLog')
+    SystemErrorLog.objects.update(last_seen=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_comment_recipe_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemerrorlog',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='systemerrorlog',
+            name='last_seen',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='systemerrorlog',
+            name='occurrences',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(copy_created_to_last_seen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='rejected',
+            field=models.BooleanField(default=False),
+        ),
+    ]
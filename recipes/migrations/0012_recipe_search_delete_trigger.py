@@ -0,0 +1,31 @@
+from django.db import migrations
+
+# Frozen copy of the trigger in recipes/search.py at the time of this migration
+CREATE_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_delete AFTER DELETE ON recipes_recipe "
+    "BEGIN DELETE FROM recipes_recipe_fts WHERE rowid = old.id; END"
+)
+DROP_TRIGGER = "DROP TRIGGER IF EXISTS recipes_recipe_fts_delete"
+
+
+def create_delete_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_TRIGGER)
+
+
+def drop_delete_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(DROP_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_rejected'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_delete_trigger, drop_delete_trigger),
+    ]
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0012_recipe_search_delete_trigger'),
+    ]
+
+    operations = [
+        # Case-insensitive username lookups (recipes.usernames) compare
+        # LOWER(username), which only this expression index can serve.
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_username_lower_idx ON auth_user (LOWER(username))',
+            'DROP INDEX IF EXISTS auth_user_username_lower_idx',
+        ),
+    ]
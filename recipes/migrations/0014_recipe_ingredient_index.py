@@ -0,0 +1,118 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:04
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Frozen copy of recipes.ingredients.parse() at the time of this migration;
+# the live parser may change, the backfill must not.
+NAME_MAX_LENGTH = 100
+UNITS = {
+    'g', 'gram', 'grams', 'kg', 'mg', 'ml', 'l', 'litre', 'liter', 'cl', 'dl', 'oz', 'ounce', 'lb', 'lbs',
+    'pound', 'cup', 'cups', 'tbsp', 'tbs', 'tablespoon', 'tsp', 'teaspoon', 'pinch', 'dash', 'handful',
+    'clove', 'cloves', 'slice', 'can', 'tin', 'packet', 'pack', 'bunch', 'sprig', 'stick', 'piece', 'pcs',
+    'inch', 'cm', 'drop', 'quart', 'pint', 'jar', 'bottle', 'bag', 'box', 'head', 'stalk', 'leaf',
+}
+DESCRIPTORS = {
+    'fresh', 'freshly', 'dried', 'chopped', 'finely', 'roughly', 'coarsely', 'diced', 'minced', 'sliced',
+    'grated', 'shredded', 'crushed', 'ground', 'peeled', 'large', 'small', 'medium', 'big', 'ripe',
+    'boneless', 'skinless', 'cooked', 'uncooked', 'raw', 'frozen', 'thawed', 'softened', 'melted',
+    'beaten', 'whole', 'halved', 'quartered', 'cubed', 'heaped', 'level', 'about', 'approx', 'extra',
+    'optional', 'taste', 'needed', 'required', 'some', 'few', 'of', 'and', 'or', 'to', 'a', 'an', 'the',
+    'for', 'as', 'plus', 'more', 'into', 'cut', 'pieces', 'thinly', 'thickly', 'warm', 'cold', 'hot',
+}
+_WORD_RE = re.compile(r'[^\W\d_]+', re.UNICODE)
+_PARENS_RE = re.compile(r'\([^)]*\)')
+
+
+def _singular(word):
+    if len(word) <= 3 or word.endswith(('ss', 'us', 'is')):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'ches', 'shes', 'xes')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+def _normalize(text):
+    text = _PARENS_RE.sub(' ', text.lower()).split(',')[0]
+    words = [
+        _singular(word) for word in _WORD_RE.findall(text)
+        if word.isalpha() and word not in UNITS and word not in DESCRIPTORS
+    ]
+    return ' '.join(words)[:NAME_MAX_LENGTH].strip()
+
+
+def _parse(text):
+    names = (_normalize(line) for line in (text or '').splitlines())
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def backfill_index(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+
+    def flush(recipes):
+        RecipeIngredient.objects.bulk_create(
+            (RecipeIngredient(recipe_id=recipe.pk, name=name) for recipe in recipes for name in recipe.names),
+            batch_size=BATCH_SIZE,
+        )
+        Recipe.objects.bulk_update(recipes, ['ingredient_count'], batch_size=BATCH_SIZE)
+
+    batch = []
+    for recipe in Recipe.objects.only('pk', 'ingredients').order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        recipe.names = _parse(recipe.ingredients)
+        recipe.ingredient_count = len(recipe.names)
+        batch.append(recipe)
+        if len(batch) == BATCH_SIZE:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+
+def recreate_search_delete_trigger(apps, schema_editor):
+    # Adding/removing the checked ingredient_count column makes SQLite
+    # rebuild recipes_recipe, which drops the trigger created in 0012
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_delete AFTER DELETE ON recipes_recipe "
+        "BEGIN DELETE FROM recipes_recipe_fts WHERE rowid = old.id; END"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_user_username_lower_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, recreate_search_delete_trigger),
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(recreate_search_delete_trigger, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='RecipeIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredient_index', to='recipes.recipe')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'recipe'], name='recipeingredient_name_idx')],
+                'unique_together': {('recipe', 'name')},
+            },
+        ),
+        migrations.RunPython(backfill_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_recipe_ingredient_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErrorHourlyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('error', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_counts', to='recipes.systemerrorlog')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour', 'error', 'count'], name='errorhourly_hour_idx')],
+                'unique_together': {('error', 'hour')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_error_hourly_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['name', 'status'], name='job_pending_name_idx'),
+        ),
+    ]
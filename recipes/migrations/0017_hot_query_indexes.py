@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_job_pending_name_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['-created_at', '-id'], name='feedback_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['approved', '-created_at', '-id'], name='recipe_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['approved', '-like_count', '-id'], name='recipe_live_likes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['approved', '-avg_rating', '-id'], name='recipe_live_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['approved', 'category', '-created_at', '-id'], name='recipe_live_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['approved', 'updated_at'], name='recipe_live_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['approved', 'rejected', '-created_at', '-id'], name='recipe_moderation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemerrorlog',
+            index=models.Index(fields=['resolved', 'fingerprint', 'path', 'method'], name='errorlog_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemerrorlog',
+            index=models.Index(fields=['resolved', 'last_seen', 'occurrences'], name='errorlog_seen_idx'),
+        ),
+        # Dashboard users panel: newest members first
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_date_joined_idx ON auth_user (date_joined DESC, id DESC)',
+            'DROP INDEX IF EXISTS auth_user_date_joined_idx',
+        ),
+    ]
@@ -1,9 +1,79 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.text import slugify
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from . import backends, caching, images, ingredients, jobs, search, usernames
+
+
+SLUG_ALLOCATION_ATTEMPTS = 5
+
+
+def base_slug(title, max_length):
+    # Leave room for a "-<n>" suffix within the column length
+    return (slugify(title) or 'recipe')[:max_length - 6].strip('-') or 'recipe'
+
+
+def next_free_slug(base, taken):
+    """First of base, base-1, base-2, ... not in `taken` (same scheme as before)."""
+    if base not in taken:
+        return base
+    counter = 1
+    while f"{base}-{counter}" in taken:
+        counter += 1
+    return f"{base}-{counter}"
+
+
+def rounded_average(total, count):
+    """SQL expression for round(total / count, 1), or 0 when count is 0."""
+    return Coalesce(
+        Round(Cast(total, models.FloatField()) / NullIf(count, 0), 1),
+        Value(0.0),
+        output_field=models.FloatField(),
+    )
+
+
+def recipe_stats_from_source(through, rating_model):
+    """Subquery expressions that recompute the denormalized Recipe counters
+    from the likes M2M table and the ratings table."""
+    def scalar(qs, aggregate):
+        return Coalesce(
+            Subquery(qs.filter(recipe_id=OuterRef('pk')).values('recipe_id').annotate(v=aggregate).values('v')),
+            Value(0),
+        )
+
+    rating_sum = scalar(rating_model.objects.all(), Sum('score'))
+    rating_count = scalar(rating_model.objects.all(), Count('id'))
+    return {
+        'like_count': scalar(through.objects.all(), Count('id')),
+        'rating_sum': rating_sum,
+        'rating_count': rating_count,
+        'avg_rating': rounded_average(rating_sum, rating_count),
+    }
+
+
+def delete_recipes(qs):
+    """Delete the recipes in ``qs`` with one DELETE per table; returns how many.
+
+    ``qs.delete()`` loads every recipe to send ``post_delete``, whose only
+    receiver bumps the catalog version; callers bump it once instead. The
+    dependent rows (all CASCADE, no signals of their own) go first, the
+    search rows with the FTS delete trigger.
+    """
+    recipes = qs.values('pk')
+    with transaction.atomic():
+        for field in Recipe._meta.many_to_many:
+            field.remote_field.through._base_manager.filter(**{f'{field.m2m_field_name()}__in': recipes}).delete()
+        for relation in Recipe._meta.related_objects:
+            if relation.on_delete is not models.CASCADE:
+                raise TypeError(f'delete_recipes() does not handle {relation.related_model.__name__}.{relation.field.name}')
+            relation.related_model._base_manager.filter(**{f'{relation.field.name}__in': recipes}).delete()
+        return qs._raw_delete(qs.db)
+
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -30,38 +100,132 @@ class Recipe(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     approved = models.BooleanField(default=False)
+    # Set by moderators to drop a submission from the pending queue
+    # without deleting it; cleared again when the author edits it.
+    rejected = models.BooleanField(default=False)
     likes = models.ManyToManyField(User, related_name='liked_recipes', blank=True)
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            base = slugify(self.title)
-            slug = base
-            counter = 1
-            while Recipe.objects.filter(slug=slug).exists():
-                slug = f"{base}-{counter}"
-                counter += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+    # Denormalized counters, kept current by record_like()/record_rating()
+    # and repaired by `manage.py reconcile_recipe_stats`.
+    like_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    avg_rating = models.FloatField(default=0)
+    # Number of distinct parsed ingredients, maintained with the
+    # RecipeIngredient index (see recipes.ingredients).
+    ingredient_count = models.PositiveSmallIntegerField(default=0)
 
-    def like_count(self):
-        return self.likes.count()
+    class Meta:
+        # Every index leads with the state columns so filter(approved=...)
+        # is a SEARCH, not a scan (see recipes.db.BooleanExact; check with
+        # manage.py explain_views).
+        indexes = [
+            # Keyset-paginated browse orderings over approved recipes
+            models.Index(fields=['approved', '-created_at', '-id'], name='recipe_live_created_idx'),
+            models.Index(fields=['approved', '-like_count', '-id'], name='recipe_live_likes_idx'),
+            models.Index(fields=['approved', '-avg_rating', '-id'], name='recipe_live_rating_idx'),
+            # Browse page filtered by category, newest first
+            models.Index(fields=['approved', 'category', '-created_at', '-id'], name='recipe_live_category_idx'),
+            # Validators: MAX(updated_at) of approved recipes
+            models.Index(fields=['approved', 'updated_at'], name='recipe_live_updated_idx'),
+            # Moderation queue, newest first, and the dashboard counters
+            models.Index(fields=['approved', 'rejected', '-created_at', '-id'], name='recipe_moderation_idx'),
+        ]
 
-    def avg_rating(self):
-        ratings = self.ratings.all()
-        if not ratings:
-            return 0
-        return round(sum(r.score for r in ratings) / ratings.count(), 1)
+    def save(self, *args, **kwargs):
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        # One prefix query picks the next free slug; a concurrent insert of
+        # the same slug trips the unique index and we simply pick again.
+        base = base_slug(self.title, self._meta.get_field('slug').max_length)
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+            # A range, not startswith: SQLite runs LIKE as a full index scan
+            taken = set(
+                Recipe.objects.filter(slug__gte=base, slug__lt=base + '\U0010ffff').values_list('slug', flat=True)
+            )
+            self.slug = next_free_slug(base, taken)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                self.slug = ''
+                if attempt == SLUG_ALLOCATION_ATTEMPTS - 1:
+                    raise
+
+    def set_like(self, user, liked):
+        """Like or unlike as a single INSERT or DELETE on the likes table.
+
+        Safe under concurrent clicks: the unique (recipe, user) constraint makes
+        a duplicate like a no-op, and the counter only moves when a row was
+        actually inserted or deleted. Returns True if anything changed.
+        """
+        through = Recipe.likes.through
+        with transaction.atomic():
+            if liked:
+                try:
+                    with transaction.atomic():
+                        through.objects.create(recipe_id=self.pk, user_id=user.pk)
+                except IntegrityError:
+                    return False
+                self.record_like(1)
+                return True
+            deleted, _ = through.objects.filter(recipe_id=self.pk, user_id=user.pk).delete()
+            if deleted:
+                self.record_like(-1)
+            return bool(deleted)
+
+    def record_like(self, delta):
+        """Atomically add `delta` (+1/-1) to the stored like count.
+
+        ``updated_at`` is touched too, so HTTP validators see the change.
+        """
+        Recipe.objects.filter(pk=self.pk).update(like_count=F('like_count') + delta, updated_at=timezone.now())
+        self.refresh_from_db(fields=['like_count', 'updated_at'])
+
+    def record_rating(self, score_delta, count_delta):
+        """Atomically apply a rating change and recompute the average in the same UPDATE."""
+        new_sum = F('rating_sum') + score_delta
+        new_count = F('rating_count') + count_delta
+        Recipe.objects.filter(pk=self.pk).update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            avg_rating=rounded_average(new_sum, new_count),
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=['rating_sum', 'rating_count', 'avg_rating', 'updated_at'])
 
     def __str__(self):
         return self.title
 
 
+class RecipeIngredient(models.Model):
+    """Inverted ingredient index: one normalized ingredient name per row."""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='ingredient_index')
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = ('recipe', 'name')
+        indexes = [
+            # Finds every recipe using an ingredient without touching recipes
+            models.Index(fields=['name', 'recipe'], name='recipeingredient_name_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
 class Comment(models.Model):
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['recipe', '-created_at', '-id'], name='comment_recipe_created_idx'),
+        ]
+
     def __str__(self):
         return f'Comment by {self.user.username} on {self.recipe.title}'
 
@@ -78,11 +242,34 @@ class Rating(models.Model):
         return f'{self.score} by {self.user.username}'
 
 
+def with_user_state(qs, user):
+    """Annotate recipes with `user_liked` and `user_score` for `user`.
+
+    Both are indexed lookups on the (recipe, user) unique keys, so they are
+    folded into the same query that loads the recipe.
+    """
+    if not user.is_authenticated:
+        return qs.annotate(user_liked=Value(False), user_score=Value(0))
+    return qs.annotate(
+        user_liked=Exists(Recipe.likes.through.objects.filter(recipe_id=OuterRef('pk'), user_id=user.pk)),
+        user_score=Coalesce(
+            Subquery(Rating.objects.filter(recipe_id=OuterRef('pk'), user_id=user.pk).values('score')[:1]),
+            Value(0),
+        ),
+    )
+
+
 class Feedback(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Dashboard feedback panel, newest first
+            models.Index(fields=['-created_at', '-id'], name='feedback_created_idx'),
+        ]
+
     def __str__(self):
         return f'Feedback {self.id} by {self.user}'
 
@@ -107,11 +294,37 @@ class SystemErrorLog(models.Model):
     status_code = models.IntegerField(default=500)
     created_at = models.DateTimeField(auto_now_add=True)
     resolved = models.BooleanField(default=False)
+    # Repeats of the same unresolved error are folded into one row
+    fingerprint = models.CharField(max_length=40, blank=True, db_index=True)
+    occurrences = models.PositiveIntegerField(default=1)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Error dashboard groups (GROUP BY fingerprint, path, method)
+            models.Index(fields=['resolved', 'fingerprint', 'path', 'method'], name='errorlog_group_idx'),
+            # Summary counter: SUM(occurrences) per state
+            models.Index(fields=['resolved', 'last_seen', 'occurrences'], name='errorlog_seen_idx'),
+        ]
 
     def __str__(self):
         return f"Error {self.id}: {self.error_message[:50]}..."
 
 
+class ErrorHourlyCount(models.Model):
+    """Occurrences of one ``SystemErrorLog`` row per hour (rates on the error dashboard)."""
+    error = models.ForeignKey(SystemErrorLog, on_delete=models.CASCADE, related_name='hourly_counts')
+    hour = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [('error', 'hour')]
+        indexes = [
+            # Dashboard windows: hour range, then the error row's resolved flag
+            models.Index(fields=['hour', 'error', 'count'], name='errorhourly_hour_idx'),
+        ]
+
+
 class DeveloperInviteCode(models.Model):
     code = models.CharField(max_length=50, unique=True)
     is_active = models.BooleanField(default=True)
@@ -122,6 +335,38 @@ class DeveloperInviteCode(models.Model):
         return f"{self.code} ({'Active' if self.is_active else 'Used'})"
 
 
+class Job(models.Model):
+    """A queued unit of background work, run by `manage.py runworker`."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    kind = models.CharField(max_length=10, default='io')
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    claim_token = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'status', '-priority', 'run_after'], name='job_claim_idx'),
+            models.Index(fields=['claim_token'], name='job_claim_token_idx'),
+            # enqueue() skips a job already pending with the same name/args
+            models.Index(fields=['name', 'status'], name='job_pending_name_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}{tuple(self.args)} [{self.status}]"
+
+
 # Signal to create UserProfile when User is created
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -133,3 +378,59 @@ def create_user_profile(sender, instance, created, **kwargs):
 def save_user_profile(sender, instance, **kwargs):
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+
+# Keep the full-text search index in sync with recipe rows; deletes are
+# handled by a database trigger (see recipes.search)
+@receiver(post_save, sender=Recipe)
+def index_recipe_for_search(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_recipe(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe_ingredients(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ingredients.index_recipe(instance)
+
+
+# A new or renamed user makes the cached availability answer stale
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_username_availability(sender, instance, **kwargs):
+    usernames.forget(instance.username)
+
+
+# The session user is served from a cached snapshot (recipes.backends)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    backends.forget(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_cached_profile_user(sender, instance, **kwargs):
+    backends.forget(instance.user_id)
+
+
+# Any change to the catalog invalidates cached category/featured queries
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_catalog_cache(sender, **kwargs):
+    caching.bump_version(caching.CATALOG)
+
+
+# Resized variants are generated off-request by the job worker
+@receiver(post_save, sender=Recipe)
+def generate_recipe_image_variants(sender, instance, raw=False, **kwargs):
+    if not raw and instance.image and not images.has_variants(instance.image):
+        jobs.enqueue('images.generate_variants', 'recipes.Recipe', instance.pk, 'image')
+
+
+@receiver(post_save, sender=UserProfile)
+def generate_profile_image_variants(sender, instance, raw=False, **kwargs):
+    if not raw and instance.profile_image and not images.has_variants(instance.profile_image):
+        jobs.enqueue('images.generate_variants', 'recipes.UserProfile', instance.pk, 'profile_image')
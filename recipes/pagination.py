@@ -0,0 +1,117 @@
+"""Keyset (cursor) pagination.
+
+Instead of OFFSET, each page remembers the sort key of its last row and the
+next page asks for rows strictly after it, so page 500 is as cheap as page 1
+as long as the ordering is backed by an index.
+"""
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+class CountedPaginator(Paginator):
+    """Offset ``Paginator`` for a total the caller already knows, so no COUNT(*)."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+
+    @cached_property
+    def count(self):
+        return self._known_count
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise Http404('Invalid cursor')
+    if not isinstance(values, list):
+        raise Http404('Invalid cursor')
+    return values
+
+
+def _to_python(model, name, value):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # Annotations (e.g. search rank) are plain numbers.
+        return float(value)
+    try:
+        return field.to_python(value)
+    except ValidationError:
+        raise Http404('Invalid cursor')
+
+
+def _after(keys, values):
+    """Build ``WHERE (k1, k2, ...) > (v1, v2, ...)`` honouring per-key direction."""
+    clauses = []
+    for i, key in enumerate(keys):
+        name = key.lstrip('-')
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        equal = {k.lstrip('-'): v for k, v in zip(keys[:i], values[:i])}
+        clauses.append(Q(**equal, **{f'{name}__{lookup}': values[i]}))
+    return reduce(or_, clauses)
+
+
+def _keyset_queryset(qs, keys, cursor):
+    qs = qs.order_by(*keys)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise Http404('Invalid cursor')
+        values = [_to_python(qs.model, k.lstrip('-'), v) for k, v in zip(keys, values)]
+        qs = qs.filter(_after(keys, values))
+    return qs
+
+
+def _make_page(items, keys, per_page):
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor([last[k.lstrip('-')] for k in keys])
+        else:
+            next_cursor = encode_cursor([getattr(last, k.lstrip('-')) for k in keys])
+    return KeysetPage(items, next_cursor)
+
+
+async def apaginate_keyset(qs, keys, cursor=None, per_page=12):
+    """Return one ``KeysetPage`` of ``qs`` ordered by ``keys``.
+
+    ``keys`` uses ``order_by`` syntax and must end in a unique column
+    (normally ``-id``) so the ordering is total. ``values()`` querysets work
+    too, as long as every key column is among the selected values.
+    """
+    qs = _keyset_queryset(qs, keys, cursor)
+    return _make_page([item async for item in qs[:per_page + 1]], keys, per_page)
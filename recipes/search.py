@@ -0,0 +1,151 @@
+"""Full-text search over recipes backed by an SQLite FTS5 table.
+
+The index lives in ``recipes_recipe_fts`` (created by migration 0006) and is
+keyed by the recipe id through the FTS ``rowid``. Rows are written from the
+``Recipe`` save signal in ``models.py`` and removed by an ``AFTER DELETE``
+trigger (migration 0012), so bulk and cascading deletes stay in sync too;
+``manage.py rebuild_search_index`` repopulates it from scratch.
+
+A migration that rebuilds ``recipes_recipe`` silently drops the trigger.
+``ensure_delete_trigger`` (``post_migrate``) puts it back after every
+``migrate`` and ``check --database default`` reports it missing.
+"""
+import re
+
+from django.core import checks
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'recipes_recipe_fts'
+FTS_COLUMNS = ('title', 'short_description', 'ingredients')
+# SQLite drops triggers when a migration rebuilds recipes_recipe (e.g. some
+# AddField/AlterField operations); such migrations must recreate it
+DELETE_TRIGGER = f'{FTS_TABLE}_delete'
+
+# bm25() column weights, same order as FTS_COLUMNS: a hit in the title
+# counts far more than one buried in the ingredient list.
+RANK_WEIGHTS = (10.0, 5.0, 1.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def create_delete_trigger(schema_editor):
+    schema_editor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {DELETE_TRIGGER} AFTER DELETE ON recipes_recipe "
+        f"BEGIN DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END"
+    )
+
+
+def _delete_trigger_missing(conn):
+    """True when migration 0012 is applied but its trigger is gone."""
+    if conn.vendor != 'sqlite':
+        return False
+    if ('recipes', '0012_recipe_search_delete_trigger') not in MigrationRecorder(conn).applied_migrations():
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = %s", [DELETE_TRIGGER])
+        return cursor.fetchone() is None
+
+
+def ensure_delete_trigger(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    conn = connections[using]
+    if _delete_trigger_missing(conn):
+        with conn.schema_editor() as schema_editor:
+            create_delete_trigger(schema_editor)
+
+
+def check_delete_trigger(app_configs, databases=None, **kwargs):
+    return [
+        checks.Warning(
+            f'The full-text search delete trigger {DELETE_TRIGGER} is missing on {alias!r}.',
+            hint='A table rebuild dropped it; run migrate, which recreates it.',
+            id='recipes.W001',
+        )
+        for alias in databases or ()
+        if _delete_trigger_missing(connections[alias])
+    ]
+
+
+def build_match_query(q):
+    """Turn free user input into a safe FTS5 MATCH expression.
+
+    Every word is quoted (so FTS operators typed by users are treated as
+    text) and gets a trailing ``*`` for prefix matching; terms are ANDed.
+    """
+    terms = _TOKEN_RE.findall(q or '')
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def index_recipe(recipe):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [recipe.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s)",
+            [recipe.pk, recipe.title, recipe.short_description, recipe.ingredients],
+        )
+
+
+def index_recipes(recipes):
+    """Bulk variant of index_recipe() for freshly inserted rows (bulk_create)."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s)",
+            [(r.pk, r.title, r.short_description, r.ingredients) for r in recipes],
+        )
+
+
+def rebuild_index():
+    """Repopulate the whole index from ``recipes_recipe``; returns row count."""
+    from .models import Recipe
+
+    columns = ', '.join(FTS_COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {columns}) "
+            f"SELECT id, {columns} FROM {Recipe._meta.db_table}"
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def search_recipes(qs, q):
+    """Filter a ``Recipe`` queryset down to matches for ``q``, best first.
+
+    The result is annotated with ``search_rank`` (bm25, lower is better).
+    Falls back to the old ``icontains`` scan on non-SQLite databases.
+    """
+    match = build_match_query(q)
+    # Every path annotates search_rank: callers order and paginate on it
+    if not match:
+        return qs.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if not fts_available():
+        return qs.filter(
+            Q(title__icontains=q) |
+            Q(short_description__icontains=q) |
+            Q(ingredients__icontains=q)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    table = qs.model._meta.db_table
+    weights = ', '.join(str(w) for w in RANK_WEIGHTS)
+    return qs.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+    ).annotate(
+        search_rank=RawSQL(
+            f"SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+            [match],
+        )
+    ).order_by('search_rank', '-created_at')
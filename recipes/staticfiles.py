@@ -0,0 +1,153 @@
+"""Static asset pipeline: CSS bundles, content hashes, precompressed copies.
+
+``collectstatic`` with ``BundledManifestStorage`` concatenates and minifies
+each ``STATIC_BUNDLES`` entry into ``css/<name>.bundle.css``. It then hashes
+every file the usual ``ManifestStaticFilesStorage`` way and writes a
+``.gz`` sibling next to each text asset. ``{% stylesheet %}``
+(``templatetags/assets.py``) links the bundle, or the individual sources
+while DEBUG is on.
+
+``serve()`` hands out the collected files when Django serves them itself.
+The gzip copy goes to clients that accept it. Hashed names get a year-long
+``immutable`` lifetime; anything else is cached briefly.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.xml', '.html', '.map')
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+_COMMENT_RE = re.compile(r'/\*(?!!).*?\*/', re.S)
+_SPACE_RE = re.compile(r'\s+')
+_PUNCTUATION_RE = re.compile(r'\s*([{};,>])\s*')
+
+
+def bundle_name(name):
+    return f'css/{name}.bundle.css'
+
+
+def minify_css(css):
+    """Conservative CSS minifier: comments, whitespace and redundant ``;``.
+
+    Whitespace is only dropped around ``{ } ; , >`` and after ``:``, so
+    selectors like ``a :hover`` and ``calc(1px + 2px)`` keep their meaning.
+    """
+    css = _COMMENT_RE.sub('', css)
+    css = _SPACE_RE.sub(' ', css)
+    css = _PUNCTUATION_RE.sub(r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+class BundledManifestStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name, sources in settings.STATIC_BUNDLES.items():
+                target = bundle_name(name)
+                css = '\n'.join(self._read(paths, source) for source in sources)
+                if self.exists(target):
+                    self.delete(target)
+                self._save(target, ContentFile(minify_css(css).encode()))
+                paths[target] = (self, target)
+
+        compressed = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not dry_run and not isinstance(processed, Exception):
+                for path in (name, hashed_name):
+                    if path and path not in compressed:
+                        compressed.add(path)
+                        self._compress(path)
+            yield name, hashed_name, processed
+
+    def _read(self, paths, source):
+        if source not in paths:
+            raise ValueError(f"Static bundle source '{source}' was not collected.")
+        storage, path = paths[source]
+        with storage.open(path) as fh:
+            return fh.read().decode()
+
+    def _compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+            return
+        with self.open(name) as fh:
+            data = fh.read()
+        # mtime=0 keeps the output identical between builds
+        packed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(packed) < len(data):
+            if self.exists(f'{name}.gz'):
+                self.delete(f'{name}.gz')
+            self._save(f'{name}.gz', ContentFile(packed))
+
+
+@lru_cache(maxsize=None)
+def _hashed_names():
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an ``Accept-Encoding`` value allows gzip (RFC 9110 12.5.3).
+
+    An explicit ``gzip`` (or ``x-gzip``) entry decides; otherwise ``*``
+    does. Either is refused with ``q=0``.
+    """
+    wildcard = None
+    for item in accept_encoding.split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        coding = coding.lower()
+        if coding in ('gzip', 'x-gzip'):
+            return quality > 0
+        if coding == '*':
+            wildcard = quality > 0
+    return bool(wildcard)
+
+
+@require_safe
+def serve(request, path):
+    """Serve a collected static file, precompressed when the client accepts gzip."""
+    try:
+        fullpath = staticfiles_storage.path(path)
+    except (SuspiciousFileOperation, NotImplementedError):
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    mtime = os.stat(fullpath).st_mtime
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime):
+        response = HttpResponseNotModified()
+    else:
+        content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+        gzipped = f'{fullpath}.gz'
+        if accepts_gzip(request.headers.get('Accept-Encoding', '')) and os.path.isfile(gzipped):
+            response = FileResponse(open(gzipped, 'rb'), content_type=content_type)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+        response.headers['Last-Modified'] = http_date(mtime)
+
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if path in _hashed_names():
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.STATIC_MAX_AGE)
+    return response
@@ -0,0 +1,22 @@
+"""Jobs run by ``manage.py runworker`` (see ``recipes.jobs``)."""
+from django.apps import apps
+
+from . import images
+from .jobs import CPU, IO, job
+
+
+@job('images.generate_variants', kind=CPU, priority=5)
+def generate_image_variants(model_label, pk, field):
+    model = apps.get_model(model_label)
+    obj = model.objects.filter(pk=pk).only('pk', field).first()
+    if obj is None:
+        return 0
+    return images.generate_variants(getattr(obj, field))
+
+
+@job('recipes.reconcile_stats', kind=IO)
+def reconcile_recipe_stats(*pks):
+    from .models import Rating, Recipe, recipe_stats_from_source
+
+    stats = recipe_stats_from_source(Recipe.likes.through, Rating)
+    return Recipe.objects.filter(pk__in=pks).update(**stats)
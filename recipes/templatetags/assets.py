@@ -0,0 +1,23 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from recipes.staticfiles import bundle_name
+
+register = template.Library()
+
+
+@register.simple_tag
+def stylesheet(name):
+    """Link the ``STATIC_BUNDLES[name]`` CSS bundle.
+
+    With DEBUG on the sources are linked one by one (no collectstatic
+    needed); otherwise the minified bundle's hashed URL is used.
+    """
+    if settings.DEBUG:
+        return format_html_join(
+            '\n', '<link rel="stylesheet" href="{}">',
+            ((static(source),) for source in settings.STATIC_BUNDLES[name]),
+        )
+    return format_html('<link rel="stylesheet" href="{}">', static(bundle_name(name)))
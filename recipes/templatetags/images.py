@@ -0,0 +1,40 @@
+from django import template
+from django.utils.html import format_html
+
+from recipes.images import has_variants, variant_srcset, variant_url
+
+register = template.Library()
+
+# Which variants each display slot may pick from via srcset
+SLOT_VARIANTS = {
+    'thumb': ('thumb',),
+    'card': ('card', 'hero'),
+    'hero': ('card', 'hero'),
+}
+
+
+@register.simple_tag
+def picture(fieldfile, slot, sizes='100vw', alt='', css_class='', style=''):
+    """Render a <picture> with WebP/JPEG srcsets for `slot`.
+
+    Falls back to the original upload when variants have not been generated
+    yet (e.g. before `manage.py generate_image_variants` has run).
+    """
+    if not fieldfile:
+        return ''
+    if not has_variants(fieldfile):
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" style="{}" loading="lazy">',
+            fieldfile.url, alt, css_class, style,
+        )
+    variants = SLOT_VARIANTS[slot]
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" style="{}" loading="lazy">'
+        '</picture>',
+        variant_srcset(fieldfile, variants, 'webp'), sizes,
+        variant_url(fieldfile, variants[0], 'jpg'),
+        variant_srcset(fieldfile, variants, 'jpg'), sizes,
+        alt, css_class, style,
+    )
@@ -0,0 +1,11 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, param, number):
+    """The current query string with ``param`` set to ``number``, so other panels keep their page."""
+    query = context['request'].GET.copy()
+    query[param] = number
+    return f'?{query.urlencode()}'
@@ -0,0 +1,255 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from . import errorlog, images, jobs
+from .management.commands.explain_views import PAGE_TABLES, SMALL_TABLES, explain_selects, full_scans
+from .models import Category, Comment, Feedback, Job, Rating, Recipe, SystemErrorLog
+
+
+class FullScansTests(TestCase):
+    def test_only_search_rows_pass(self):
+        plan = [
+            (2, 0, 0, 'SEARCH recipes_recipe USING INDEX recipe_live_created_idx (approved=?)'),
+            (3, 0, 0, 'SEARCH auth_user USING INTEGER PRIMARY KEY (rowid=?)'),
+            (4, 0, 0, 'SCAN subquery-1'),
+            (5, 0, 0, 'SCAN CONSTANT ROW'),
+            (6, 0, 0, 'SCAN recipes_fts VIRTUAL TABLE INDEX 0:M4'),
+        ]
+        self.assertEqual(full_scans(plan), [])
+
+    def test_index_scans_fail(self):
+        plan = [
+            (2, 0, 0, 'SCAN recipes_recipe'),
+            (3, 0, 0, 'SCAN auth_user USING INDEX auth_user_date_joined_idx'),
+            (4, 0, 0, 'SCAN recipes_feedback USING COVERING INDEX feedback_created_idx'),
+        ]
+        self.assertEqual(full_scans(plan), ['recipes_recipe', 'auth_user', 'recipes_feedback'])
+
+
+# Pages render without collectstatic (and so without a manifest) in tests
+PLAIN_STATIC = {**settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+
+
+@override_settings(PAGE_CACHE_URL_NAMES=(), STORAGES=PLAIN_STATIC)
+class QueryPlanTests(TestCase):
+    """Every SELECT behind the hot pages seeks an index (see ``manage.py explain_views``)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('cook', password='secret')
+        cls.staff = User.objects.create_user('moderator', password='secret', is_staff=True)
+        cls.category = Category.objects.create(name='Desserts')
+        cls.recipe = Recipe.objects.create(
+            title='Chicken pie', author=cls.author, category=cls.category, approved=True,
+            ingredients='2 eggs\n1 cup rice\n500 g chicken', steps='Bake.',
+        )
+        Recipe.objects.create(title='Rice pudding', author=cls.author, category=cls.category, approved=True)
+        Recipe.objects.create(title='Waiting', author=cls.author)
+        Recipe.objects.create(title='Declined', author=cls.author, rejected=True)
+        Comment.objects.create(recipe=cls.recipe, user=cls.staff, content='Lovely')
+        Rating.objects.create(recipe=cls.recipe, user=cls.staff, score=4)
+        Feedback.objects.create(user=cls.author, message='Great site')
+        SystemErrorLog.objects.create(path='/boom/', method='GET', error_message='boom', traceback='', fingerprint='f')
+
+    def assertSearchesOnly(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        allowed = SMALL_TABLES | PAGE_TABLES.get(url.partition('?')[0], set())
+        for sql, plan, scanned in explain_selects(queries, allowed):
+            self.assertEqual(scanned, [], f"{url}: {sql}\n" + '\n'.join(row[-1] for row in plan))
+
+    def public_urls(self):
+        slug = self.recipe.slug
+        return [
+            '/', '/recipes/', '/recipes/?sort=popular', '/recipes/?sort=top_rated', '/recipes/?q=chicken',
+            '/recipes/?have=egg,rice', f'/recipes/?category={self.category.slug}', f'/recipes/{slug}/',
+            f'/recipes/{slug}/comments/', '/api/v1/recipes/', f'/api/v1/recipes/?category={self.category.slug}',
+            f'/api/v1/recipes/{slug}/', f'/api/v1/recipes/{slug}/comments/', '/api/v1/categories/',
+        ]
+
+    def test_anonymous_pages(self):
+        for url in self.public_urls():
+            with self.subTest(url=url):
+                self.assertSearchesOnly(url)
+
+    def test_staff_pages(self):
+        self.client.force_login(self.staff)
+        for url in ['/dashboard/', '/dev/errors/', '/dev/errors/?resolved=true'] + self.public_urls():
+            with self.subTest(url=url):
+                self.assertSearchesOnly(url)
+
+    def test_boolean_filters_compare_with_equals(self):
+        sql = str(Recipe.objects.filter(approved=True, rejected=False).query)
+        self.assertIn('"recipes_recipe"."approved" = True', sql)
+        self.assertIn('"recipes_recipe"."rejected" = False', sql)
+        sql = str(SystemErrorLog.objects.filter(resolved=False).query)
+        self.assertIn('"recipes_systemerrorlog"."resolved" = False', sql)
+        # Scoped to those fields: contrib models keep Django's own SQL
+        sql = str(User.objects.filter(is_active=True).query)
+        self.assertNotIn('"auth_user"."is_active" = True', sql)
+
+
+class MetricsExportAccessTests(TestCase):
+    def test_staff_only_by_default(self):
+        self.assertEqual(self.client.get('/dev/metrics/').status_code, 302)
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_bearer_token(self):
+        response = self.client.get('/dev/metrics/', headers={'Authorization': 'Bearer scrape-me'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'delicious_error_log_failed_total')
+        self.assertEqual(self.client.get('/dev/metrics/', headers={'Authorization': 'Bearer wrong'}).status_code, 302)
+        # The token opens the export only, not the dashboard
+        self.assertEqual(
+            self.client.get('/dev/metrics/summary/', headers={'Authorization': 'Bearer scrape-me'}).status_code, 302,
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.0/8'])
+    def test_allowed_addresses(self):
+        self.assertEqual(self.client.get('/dev/metrics/', REMOTE_ADDR='10.1.2.3').status_code, 200)
+        self.assertEqual(self.client.get('/dev/metrics/', REMOTE_ADDR='192.0.2.1').status_code, 302)
+
+
+@override_settings(PAGE_CACHE_URL_NAMES=(), STORAGES=PLAIN_STATIC)
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('cook', password='secret')
+        Recipe.objects.create(title='Chicken pie', author=author, approved=True)
+
+    def test_queries_without_words_find_nothing(self):
+        for q in (' ', '"', '?', '!', '*"-'):
+            for url in ('/recipes/', '/search/', '/api/v1/recipes/'):
+                with self.subTest(url=url, q=q):
+                    response = self.client.get(url, {'q': q})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertNotContains(response, 'Chicken pie')
+
+    def test_words_match(self):
+        self.assertContains(self.client.get('/recipes/', {'q': 'chick'}), 'Chicken pie')
+        self.assertContains(self.client.get('/api/v1/recipes/', {'q': 'chick'}), 'Chicken pie')
+
+
+class ExportStreamingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('moderator', password='secret', is_staff=True)
+        for i in range(5):
+            Recipe.objects.create(title=f'Soup {i}', author=cls.staff, approved=True)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    async def test_asgi_export_streams_an_async_iterator(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get('/dashboard/export/recipes/', {'format': 'jsonl'})
+        self.assertTrue(response.is_async)
+        lines = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(lines), 5)
+
+    def test_wsgi_export(self):
+        self.client.force_login(self.staff)
+        response = self.client.get('/dashboard/export/recipes/', {'format': 'csv'})
+        self.assertFalse(response.is_async)
+        self.assertEqual(len(list(response.streaming_content)), 6)
+
+
+@override_settings(PAGE_CACHE_URL_NAMES=(), STORAGES=PLAIN_STATIC)
+class PageValidatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('cook', password='secret')
+        cls.viewer = User.objects.create_user('reader', password='secret')
+        cls.category = Category.objects.create(name='Desserts')
+        cls.recipe = Recipe.objects.create(title='Chicken pie', author=cls.author, category=cls.category, approved=True)
+
+    def setUp(self):
+        self.client.force_login(self.viewer)
+        self.url = f'/recipes/{self.recipe.slug}/'
+        # The first response sets the CSRF cookie, which is part of the ETag
+        self.client.get(self.url)
+        self.etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': self.etag}).status_code, 304)
+
+    def assertRevalidates(self, text):
+        response = self.client.get(self.url, headers={'If-None-Match': self.etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, text)
+
+    def test_author_rename(self):
+        self.author.username = 'chef'
+        self.author.save()
+        self.assertRevalidates('chef')
+
+    def test_category_rename(self):
+        self.category.name = 'Puddings'
+        self.category.save()
+        self.assertRevalidates('Puddings')
+
+    def test_viewer_rename(self):
+        self.viewer.username = 'critic'
+        self.viewer.save()
+        self.assertRevalidates('critic')
+
+
+class ImageVariantTests(SimpleTestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+
+    def _upload(self, name, color, pil_format):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 30), color).save(buffer, pil_format)
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def test_same_stem_different_extension(self):
+        jpg = Recipe(image=self._upload('recipes/pasta.jpg', 'red', 'JPEG')).image
+        png = Recipe(image=self._upload('recipes/pasta.png', 'blue', 'PNG')).image
+        self.assertTrue(images.generate_variants(jpg))
+        self.assertFalse(images.has_variants(png))
+        self.assertTrue(images.generate_variants(png))
+
+        with default_storage.open(images.variant_name(jpg.name, 'thumb', 'jpg')) as fh:
+            red = Image.open(fh).getpixel((0, 0))
+        with default_storage.open(images.variant_name(png.name, 'thumb', 'jpg')) as fh:
+            blue = Image.open(fh).getpixel((0, 0))
+        self.assertGreater(red[0], 200)
+        self.assertGreater(blue[2], 200)
+
+
+class JobLeaseTests(TestCase):
+    def test_expired_lease_on_last_attempt_fails(self):
+        expired = timezone.now() - timedelta(minutes=1)
+        spent = Job.objects.create(name='crash', kind=jobs.CPU, status=Job.RUNNING, attempts=3, locked_until=expired)
+        retry = Job.objects.create(name='retry', kind=jobs.CPU, status=Job.RUNNING, attempts=1, locked_until=expired)
+        self.assertEqual([claimed.pk for claimed in jobs.claim(jobs.CPU, 10, 60)], [retry.pk])
+        spent.refresh_from_db()
+        self.assertEqual(spent.status, Job.FAILED)
+        self.assertIsNone(spent.locked_until)
+
+
+class ErrorLogWriterTests(TestCase):
+    def record(self, path, method='GET'):
+        return {
+            'fingerprint': 'f', 'user_id': None, 'path': path, 'method': method, 'error_message': 'boom',
+            'traceback': '', 'status_code': 500, 'last_seen': timezone.now(),
+        }
+
+    def test_same_fingerprint_on_another_path_gets_its_own_row(self):
+        writer = errorlog.ErrorLogWriter(maxsize=10, batch_size=10, flush_interval=0)
+        writer._write([self.record('/a/'), self.record('/b/'), self.record('/a/', 'POST')])
+        writer._write([self.record('/a/')])
+        rows = SystemErrorLog.objects.values_list('path', 'method', 'occurrences').order_by('path', 'method')
+        self.assertEqual(list(rows), [('/a/', 'GET', 2), ('/a/', 'POST', 1), ('/b/', 'GET', 1)])
@@ -1,12 +1,17 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     # ================= Admin / Dev =================
     path('dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('dashboard/moderate/', views.moderate_recipes, name='moderate_recipes'),
+    path('dashboard/export/<str:dataset>/', views.export_dataset, name='export_dataset'),
     path('invite-member/', views.developer_invite_add, name='dev_invite_add'),
     path('dev/errors/', views.error_dashboard, name='error_dashboard'),
+    path('dev/errors/<int:error_id>/trace/', views.error_traceback, name='error_traceback'),
     path('dev/errors/<int:error_id>/resolve/', views.resolve_error, name='resolve_error'),
+    path('dev/metrics/', views.metrics_export, name='metrics_export'),
+    path('dev/metrics/summary/', views.metrics_dashboard, name='metrics_dashboard'),
 
     # ================= Home / Recipes =================
     path('', views.home, name='home'),
@@ -16,11 +21,19 @@ urlpatterns = [
     path('recipes/<slug:slug>/edit/', views.recipe_edit, name='recipe_edit'),
     path('recipes/<slug:slug>/delete/', views.recipe_delete, name='recipe_delete'),
     path('recipes/<slug:slug>/approve/', views.recipe_approve, name='recipe_approve'),
+    path('recipes/<slug:slug>/comments/', views.recipe_comments, name='recipe_comments'),
     path('recipes/<slug:slug>/', views.recipe_detail, name='recipe_detail'),
     path('search/', views.search, name='search'),
 
+    # ================= JSON API (v1) =================
+    path('api/v1/recipes/', api.recipe_list, name='api_recipe_list'),
+    path('api/v1/recipes/<slug:slug>/', api.recipe_detail, name='api_recipe_detail'),
+    path('api/v1/recipes/<slug:slug>/comments/', api.recipe_comments, name='api_recipe_comments'),
+    path('api/v1/categories/', api.category_list, name='api_category_list'),
+
     # ================= Auth =================
     path('register/', views.register_view, name='register'),
+    path('register/check-username/', views.username_check, name='username_check'),
     path('register/developer/', views.register_dev_view, name='register_dev'),
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
@@ -0,0 +1,104 @@
+"""Username availability checks and suggestions.
+
+Lookups compare ``LOWER(username)`` against ``LOWER(value)`` so they hit the
+``auth_user_username_lower_idx`` expression index (migration 0013) instead of
+the ``iexact`` LIKE scan. The JSON endpoint used while typing goes through
+``acheck()``, which caches each answer briefly; ``forget()`` drops the entry
+when a user is saved.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.utils.text import slugify
+
+SUGGESTION_COUNT = 3
+
+
+def _lowered(qs=None):
+    return (qs if qs is not None else User.objects.all()).alias(username_lower=Lower('username'))
+
+
+def _same_name(username):
+    return _lowered().filter(username_lower=Lower(Value(username)))
+
+
+def is_taken(username, exclude_pk=None):
+    qs = _same_name(username)
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    return qs.exists()
+
+
+def _base(username):
+    return slugify(username).replace('-', '') or username.lower()
+
+
+def _prefixed(base, exclude_pk=None):
+    # ``[base, base + U+10FFFF)`` covers every name with that prefix
+    qs = _lowered().filter(username_lower__gte=base, username_lower__lt=base + '\U0010ffff')
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    return qs.values_list('username', flat=True)
+
+
+def suggest(username, count=SUGGESTION_COUNT, exclude_pk=None):
+    """``count`` free names of the form ``base``, ``base2``, ``base3``...
+
+    Every taken name starting with ``base`` is fetched in one index range
+    scan and the free candidates are picked in Python.
+    """
+    base = _base(username)
+    return _free_names(base, {name.lower() for name in _prefixed(base, exclude_pk)}, count)
+
+
+def _free_names(base, taken, count):
+    suggestions = [] if base in taken else [base]
+    suffix = 2
+    while len(suggestions) < count:
+        candidate = f'{base}{suffix}'
+        if candidate not in taken:
+            suggestions.append(candidate)
+        suffix += 1
+    return suggestions
+
+
+def _cache_key(username):
+    return f'username:{username.lower()}'
+
+
+def _invalid(username):
+    """Error answer for a malformed ``username``, or None."""
+    try:
+        User._meta.get_field('username').run_validators(username)
+        if not username:
+            raise ValidationError('Enter a username.')
+    except ValidationError as e:
+        return {'username': username, 'available': False, 'error': e.messages[0], 'suggestions': []}
+    return None
+
+
+async def acheck(username):
+    """Availability answer for the as-you-type endpoint, cached briefly."""
+    username = (username or '').strip()
+    invalid = _invalid(username)
+    if invalid:
+        return invalid
+
+    key = _cache_key(username)
+    result = await cache.aget(key)
+    if result is None:
+        taken = await _same_name(username).aexists()
+        suggestions = []
+        if taken:
+            base = _base(username)
+            suggestions = _free_names(base, {name.lower() async for name in _prefixed(base)}, SUGGESTION_COUNT)
+        result = {'available': not taken, 'suggestions': suggestions}
+        await cache.aset(key, result, settings.USERNAME_CHECK_CACHE_TIMEOUT)
+    return {'username': username, **result}
+
+
+def forget(username):
+    cache.delete(_cache_key(username))
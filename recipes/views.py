@@ -1,108 +1,290 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from asgiref.sync import async_to_sync, sync_to_async
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from .models import Recipe, Category, Comment, Rating, Feedback, UserProfile, SystemErrorLog, DeveloperInviteCode
+from .models import Recipe, Category, Comment, Rating, Feedback, UserProfile, SystemErrorLog, ErrorHourlyCount, DeveloperInviteCode, delete_recipes, with_user_state
+from .search import search_recipes
+from .pagination import CountedPaginator, apaginate_keyset
+from .caching import CATALOG, acached_query, aget_version, bump_version
+from .conditional import conditional, make_etag, page_cache_policy
+from .errorlog import get_writer
+from . import caching, exports, ingredients, jobs, metrics, usernames
 from .forms import RecipeForm, CommentForm, RatingForm, RegisterForm, FeedbackForm, DeveloperRegisterForm, UserProfileForm, UserInfoForm, ChangePasswordForm
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce
+from django.core.paginator import Paginator
 from django.contrib.auth.models import User
-from django.http import HttpResponseForbidden
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
+from django.views.decorators.vary import vary_on_headers
 from .models import DeveloperInviteCode
 from .forms import DeveloperInviteForm
 from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
 
 
-def home(request):
-    categories = Category.objects.all()[:6]
-    featured = Recipe.objects.filter(approved=True).order_by('-created_at')[:6]
-    return render(request, 'home.html', {'categories': categories, 'featured': featured})
+# The read-heavy pages (home, browse, detail GET, fragments) are async views
+# using the async ORM, so under ASGI (delicious/asgi.py) a worker keeps
+# serving other connections while one waits on the database.
 
+async def _viewer(request):
+    """The current user, loaded without blocking the event loop.
 
-def recipe_list(request):
-    qs = Recipe.objects.filter(approved=True).order_by('-created_at')
-    categories = Category.objects.all()
+    It is stored back on ``request.user`` so templates and sync helpers
+    reuse it instead of querying again.
+    """
+    request.user = await request.auser()
+    return request.user
 
-    category = request.GET.get('category')
-    q = request.GET.get('q')
+
+async def _render(request, template_name, context):
+    # Context processors (messages -> session) and templates may still
+    # query lazily, which is only allowed off the event loop
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def _page_etag(request, *parts):
+    """ETag for an HTML page: the URL, who is looking, and the data ``parts``."""
+    user = await _viewer(request)
+    if user.is_authenticated:
+        # The navbar shows the username. Logged-in pages also embed a CSRF
+        # token derived from the CSRF secret, which login rotates: a copy
+        # from an earlier login would fail on POST
+        viewer = (user.pk, user.username, user.is_staff, request.META.get('CSRF_COOKIE', ''))
+    else:
+        viewer = ('anon',)
+    return make_etag(request.get_full_path(), request.headers.get('x-requested-with', ''), *viewer, *parts)
+
+
+def _has_flash_messages(request):
+    # Flash messages show up once, so the page has to be rendered
+    return 'messages' in request.COOKIES
+
+
+async def _home_validators(request):
+    if _has_flash_messages(request):
+        return None
+    last = (await Recipe.objects.filter(approved=True).aaggregate(last=Max('updated_at')))['last']
+    return await _page_etag(request, await aget_version(CATALOG), last), last
+
+
+@page_cache_policy
+@conditional(_home_validators)
+async def home(request):
+    await _viewer(request)
+    categories = await acached_query(CATALOG, 'home:categories', Category.objects.all()[:6])
+    featured = await acached_query(
+        CATALOG, 'home:featured',
+        Recipe.objects.filter(approved=True).select_related('author', 'category').order_by('-created_at')[:6],
+    )
+    return await _render(request, 'home.html', {'categories': categories, 'featured': featured})
+
+
+# Browse page orderings; each is backed by an (approved, key, id) index
+SORT_KEYS = {
+    'newest': ('-created_at', '-id'),
+    'popular': ('-like_count', '-id'),
+    'top_rated': ('-avg_rating', '-id'),
+}
+
+
+def browse_queryset(params):
+    """Approved recipes filtered by the browse-page GET ``params``.
+
+    Returns ``(queryset, keyset keys, sort name)``; shared by ``recipe_list``
+    and the JSON API.
+    """
+    qs = Recipe.objects.filter(approved=True)
+    category = params.get('category')
+    q = params.get('q')
+    pantry = ingredients.parse_pantry(params.get('have'))
 
     if category:
         qs = qs.filter(category__slug=category)
 
+    sort = params.get('sort')
+    if sort not in SORT_KEYS:
+        sort = 'newest'
+
     if q:
-        qs = qs.filter(
-            Q(title__icontains=q) |
-            Q(short_description__icontains=q) |
-            Q(ingredients__icontains=q)
-        )
+        qs = search_recipes(qs, q)
+        keys = ('search_rank', '-id')
+    else:
+        keys = SORT_KEYS[sort]
+    if pantry:
+        # "What can I cook": recipes I have most of the ingredients for first
+        qs = ingredients.match_recipes(qs, pantry)
+        keys = ('-coverage', '-matched', '-id')
+    return qs, keys, sort
+
+
+async def _recipe_list_validators(request):
+    if _has_flash_messages(request):
+        return None
+    qs, _, _ = browse_queryset(request.GET)
+    last = (await qs.aaggregate(last=Max('updated_at')))['last']
+    # Saves and deletes bump the catalog version; likes and ratings touch updated_at
+    return await _page_etag(request, await aget_version(CATALOG), last), last
+
+
+@vary_on_headers('X-Requested-With')
+@page_cache_policy
+@conditional(_recipe_list_validators)
+async def recipe_list(request):
+    await _viewer(request)
+    categories = await acached_query(CATALOG, 'categories', Category.objects.all())
+    category = request.GET.get('category')
+
+    qs, keys, sort = browse_queryset(request.GET)
+    qs = qs.select_related('author', 'category')
+    page = await apaginate_keyset(qs, keys, request.GET.get('cursor'), settings.RECIPES_PER_PAGE)
 
-    return render(request, 'recipes/list.html', {
-        'recipes': qs,
+    next_query = None
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        next_query = params.urlencode()
+
+    context = {
+        'recipes': page,
         'categories': categories,
         'selected_category': category,
-    })
+        'selected_sort': sort,
+        'next_query': next_query,
+    }
+
+    # "Load more" fetches only the next batch of cards
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return await _render(request, 'recipes/_list_items.html', context)
+    return await _render(request, 'recipes/list.html', context)
+
+
+def _visible_recipes(user):
+    visible = Q(approved=True)
+    if user.is_authenticated:
+        visible |= Q(author=user)
+    return Recipe.objects.filter(visible)
+
+
+COMMENT_KEYS = ('-created_at', '-id')
+
+
+async def _comment_page(request, recipe):
+    comments = Comment.objects.filter(recipe=recipe).select_related('user')
+    page = await apaginate_keyset(comments, COMMENT_KEYS, request.GET.get('cursor'), settings.COMMENTS_PER_PAGE)
+    next_url = None
+    if page.has_next:
+        next_url = f"{reverse('recipe_comments', args=[recipe.slug])}?{urlencode({'cursor': page.next_cursor})}"
+    return {'comments': page, 'comments_next_url': next_url}
+
+
+async def _recipe_detail_validators(request, slug):
+    if _has_flash_messages(request):
+        return None
+    # Likes and ratings touch updated_at; comments are tracked separately.
+    # The page names the author and category: renaming a user doesn't touch
+    # the recipe, renaming a category bumps the catalog version.
+    state = await _visible_recipes(await _viewer(request)).filter(slug=slug).annotate(
+        last_comment=Max('comments__created_at'), comment_count=Count('comments'),
+    ).values('updated_at', 'last_comment', 'comment_count', 'author_id', 'author__username').afirst()
+    if state is None:
+        return None
+    last = max(filter(None, (state['updated_at'], state['last_comment'])))
+    etag = await _page_etag(
+        request, state['updated_at'], state['last_comment'], state['comment_count'],
+        state['author_id'], state['author__username'], await aget_version(CATALOG),
+    )
+    return etag, last
 
 
-def recipe_detail(request, slug):
-    recipe = get_object_or_404(
-        Recipe.objects.filter(
-            Q(approved=True) | Q(author=request.user)
-        ),
-        slug=slug
-    )
+def _recipe_detail_post(request, recipe):
+    """Handle the comment/rate/like forms of the detail page.
 
+    Returns ``(redirect, None)`` when the form was handled, or
+    ``(None, comment_form)`` to re-render the page with form errors.
+    """
+    slug = recipe.slug
     comment_form = CommentForm()
 
-    if request.method == 'POST':
-        if 'comment' in request.POST:
-            if not request.user.is_authenticated:
-                messages.error(request, 'Login required to comment')
-                return redirect('login')
-            comment_form = CommentForm(request.POST)
-            if comment_form.is_valid():
-                comment = comment_form.save(commit=False)
-                comment.user = request.user
-                comment.recipe = recipe
-                comment.save()
-                messages.success(request, 'Comment added')
-                return redirect('recipe_detail', slug=slug)
-
-        elif 'rate' in request.POST:
-            if not request.user.is_authenticated:
-                messages.error(request, 'Login required to rate')
-                return redirect('login')
-            score = int(request.POST.get('score', 5))
+    if 'comment' in request.POST:
+        if not request.user.is_authenticated:
+            messages.error(request, 'Login required to comment')
+            return redirect('login'), None
+        comment_form = CommentForm(request.POST)
+        if comment_form.is_valid():
+            comment = comment_form.save(commit=False)
+            comment.user = request.user
+            comment.recipe = recipe
+            comment.save()
+            messages.success(request, 'Comment added')
+            return redirect('recipe_detail', slug=slug), None
+
+    elif 'rate' in request.POST:
+        if not request.user.is_authenticated:
+            messages.error(request, 'Login required to rate')
+            return redirect('login'), None
+        try:
+            score = min(max(int(request.POST.get('score', 5)), 1), 5)
+        except ValueError:
+            score = 5
+        with transaction.atomic():
+            previous = Rating.objects.filter(recipe=recipe, user=request.user).values_list('score', flat=True).first()
             Rating.objects.update_or_create(recipe=recipe, user=request.user, defaults={'score': score})
-            messages.success(request, 'Rating saved')
-            return redirect('recipe_detail', slug=slug)
-
-        elif 'like' in request.POST or 'dislike' in request.POST:
-            if not request.user.is_authenticated:
-                messages.error(request, 'Login required')
-                return redirect('login')
-            if request.user in recipe.likes.all():
-                recipe.likes.remove(request.user)
+            if previous is None:
+                recipe.record_rating(score, 1)
             else:
-                recipe.likes.add(request.user)
-            return redirect('recipe_detail', slug=slug)
-
-    # Check if current user liked this recipe
-    user_liked = request.user.is_authenticated and request.user in recipe.likes.all()
+                recipe.record_rating(score - previous, 0)
+        messages.success(request, 'Rating saved')
+        return redirect('recipe_detail', slug=slug), None
+
+    elif 'like' in request.POST or 'dislike' in request.POST:
+        if not request.user.is_authenticated:
+            messages.error(request, 'Login required')
+            return redirect('login'), None
+        recipe.set_like(request.user, 'like' in request.POST)
+        return redirect('recipe_detail', slug=slug), None
+
+    return None, comment_form
+
+
+@page_cache_policy
+@conditional(_recipe_detail_validators)
+async def recipe_detail(request, slug):
+    user = await _viewer(request)
+    recipe = await aget_object_or_404(
+        with_user_state(_visible_recipes(user).select_related('author', 'category'), user),
+        slug=slug
+    )
 
-    user_rating = 0
-    if request.user.is_authenticated:
-        rating_obj = Rating.objects.filter(recipe=recipe, user=request.user).first()
-        if rating_obj:
-            user_rating = rating_obj.score
+    comment_form = CommentForm()
+    if request.method == 'POST':
+        # Writes stay synchronous (transactions are thread-bound)
+        response, comment_form = await sync_to_async(_recipe_detail_post)(request, recipe)
+        if response is not None:
+            return response
 
-    return render(request, 'recipes/detail.html', {
+    return await _render(request, 'recipes/detail.html', {
         'recipe': recipe,
         'comment_form': comment_form,
-        'user_liked': user_liked,
-        'user_rating': user_rating,
+        'user_liked': recipe.user_liked,
+        'user_rating': recipe.user_score,
+        'comment_count': await recipe.comments.acount(),
+        **await _comment_page(request, recipe),
     })
 
 
+async def recipe_comments(request, slug):
+    """HTML fragment with the next page of comments for the detail page."""
+    recipe = await aget_object_or_404(_visible_recipes(await _viewer(request)), slug=slug)
+    return await _render(request, 'recipes/_comments.html', await _comment_page(request, recipe))
+
+
 @login_required
 def recipe_create(request):
     if request.method == 'POST':
@@ -128,7 +310,10 @@ def recipe_edit(request, slug):
     if request.method == 'POST':
         form = RecipeForm(request.POST, request.FILES, instance=recipe)
         if form.is_valid():
-            form.save()
+            recipe = form.save(commit=False)
+            # An edited submission goes back into the moderation queue
+            recipe.rejected = False
+            recipe.save()
             messages.success(request, 'Recipe updated')
             return redirect('recipe_detail', slug=recipe.slug)
     else:
@@ -152,16 +337,16 @@ def recipe_delete(request, slug):
 
 
 @login_required
+@require_POST
 def recipe_approve(request, slug):
     if not request.user.is_staff:
         return HttpResponseForbidden()
 
-    recipe = get_object_or_404(Recipe, slug=slug)
-    recipe.approved = True
-    recipe.save()
+    pk = get_object_or_404(Recipe.objects.only('pk'), slug=slug).pk
+    _moderate(Recipe.objects.filter(pk=pk), 'approve')
 
     messages.success(request, 'Recipe approved successfully!')
-    return redirect('admin_dashboard')
+    return redirect(_dashboard_url(request))
 
 
 @login_required
@@ -174,15 +359,17 @@ def recipe_preview(request, slug):
 
     return render(request, 'recipes/detail.html', {
         'recipe': recipe,
-        'comment_form': comment_form
+        'comment_form': comment_form,
+        'comment_count': recipe.comments.count(),
+        **async_to_sync(_comment_page)(request, recipe),
     })
 
 
-def search(request):
+async def search(request):
     if request.method == 'POST':
         q = request.POST.get('q', '')
-        return redirect(f'/recipes/?q={q}')
-    return recipe_list(request)
+        return redirect(f"{reverse('recipe_list')}?{urlencode({'q': q})}")
+    return await recipe_list(request)
 
 
 def register_view(request):
@@ -197,6 +384,11 @@ def register_view(request):
     return render(request, 'auth/register.html', {'form': form})
 
 
+async def username_check(request):
+    """JSON availability check used by the register form while typing."""
+    return JsonResponse(await usernames.acheck(request.GET.get('username')))
+
+
 def register_dev_view(request):
     if request.method == 'POST':
         form = DeveloperRegisterForm(request.POST)
@@ -243,29 +435,230 @@ def staff_check(user):
     return user.is_staff
 
 
+MODERATION_ACTIONS = ('approve', 'reject', 'delete')
+
+
+def _moderate(qs, action):
+    """Apply a moderation action to ``qs`` in one statement per table; returns the row count.
+
+    update() and delete_recipes() bypass the save/delete signals, so the
+    catalog cache is bumped here, once.
+    """
+    if action == 'delete':
+        count = delete_recipes(qs)
+        if count:
+            bump_version(CATALOG)
+        return count
+
+    now = timezone.now()
+    if action == 'approve':
+        ids = list(qs.filter(approved=False).values_list('pk', flat=True))
+        count = Recipe.objects.filter(pk__in=ids).update(approved=True, rejected=False, updated_at=now)
+        if ids:
+            # Counters may have drifted while the recipes were pending
+            jobs.enqueue('recipes.reconcile_stats', *ids)
+    else:
+        count = qs.update(approved=False, rejected=True, updated_at=now)
+    if count:
+        bump_version(CATALOG)
+    return count
+
+
+def _dashboard_url(request):
+    # Send moderators back to the page they acted on
+    next_url = request.POST.get('next', '')
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return next_url
+    return reverse('admin_dashboard')
+
+
+def _panel(request, qs, param, count):
+    # Reuse the summary count instead of a second COUNT(*) per panel
+    return CountedPaginator(qs, settings.MODERATION_PER_PAGE, count).get_page(request.GET.get(param))
+
+
 @user_passes_test(staff_check)
 def admin_dashboard(request):
-    users = User.objects.all()
-    pending = Recipe.objects.filter(approved=False).order_by('-created_at')
-    feedbacks = Feedback.objects.all().order_by('-created_at')
-    return render(request, 'admin/dashboard.html', {'users': users, 'pending': pending, 'feedbacks': feedbacks})
+    # One indexed count per state (together they cover every recipe)
+    # instead of an aggregate that scans the whole table
+    summary = {
+        'live': Recipe.objects.filter(approved=True).count(),
+        'pending': Recipe.objects.filter(approved=False, rejected=False).count(),
+        'rejected': Recipe.objects.filter(approved=False, rejected=True).count(),
+    }
+    summary['total'] = summary['live'] + summary['pending'] + summary['rejected']
+    summary['users'] = User.objects.count()
+    summary['feedback'] = Feedback.objects.count()
+
+    pending_qs = Recipe.objects.filter(approved=False, rejected=False).select_related('author').only(
+        'title', 'slug', 'created_at', 'author__username',
+    )
+    pending = _panel(request, pending_qs.order_by('-created_at', '-id'), 'pending_page', summary['pending'])
+    feedbacks = _panel(
+        request, Feedback.objects.select_related('user').order_by('-created_at', '-id'),
+        'feedback_page', summary['feedback'],
+    )
+    users = _panel(
+        request, User.objects.only('username', 'email', 'is_staff').order_by('-date_joined', '-id'),
+        'users_page', summary['users'],
+    )
+
+    return render(request, 'admin/dashboard.html', {
+        'summary': summary,
+        'pending': pending,
+        'feedbacks': feedbacks,
+        'users': users,
+    })
+
+
+@user_passes_test(staff_check)
+@require_POST
+def moderate_recipes(request):
+    """Bulk approve/reject/delete the recipes ticked on the dashboard."""
+    action = request.POST.get('action')
+    if action not in MODERATION_ACTIONS:
+        return HttpResponseBadRequest('Unknown moderation action.')
+    if request.POST.get('scope') == 'pending':
+        # "Whole queue" runs as one filtered statement, no id list needed
+        qs = Recipe.objects.filter(approved=False, rejected=False)
+    else:
+        ids = [int(pk) for pk in request.POST.getlist('ids') if pk.isdigit()]
+        if not ids:
+            messages.warning(request, 'No recipes selected.')
+            return redirect(_dashboard_url(request))
+        qs = Recipe.objects.filter(pk__in=ids)
+
+    with transaction.atomic():
+        count = _moderate(qs, action)
+    past = {'approve': 'approved', 'reject': 'rejected', 'delete': 'deleted'}[action]
+    messages.success(request, f'{count} recipe{"" if count == 1 else "s"} {past}.')
+    return redirect(_dashboard_url(request))
+
+
+@user_passes_test(staff_check)
+def export_dataset(request, dataset):
+    """Stream a CSV/JSONL export of recipes, ratings, comments or feedback."""
+    fmt = request.GET.get('format', 'csv')
+    try:
+        if fmt not in exports.FORMATS:
+            raise exports.ExportError(f"Unknown format '{fmt}'.")
+        qs = exports.build_queryset(
+            dataset,
+            approved=exports.parse_approved(request.GET.get('approved')),
+            category=request.GET.get('category'),
+            since=request.GET.get('since'),
+            until=request.GET.get('until'),
+        )
+    except exports.ExportError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    # An ASGI response consumes a sync iterator in one go; give it an async one
+    stream = exports.astream_rows if isinstance(request, ASGIRequest) else exports.stream_rows
+    response = StreamingHttpResponse(stream(dataset, qs, fmt), content_type=f'{content_type}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{dataset}-{timezone.now():%Y%m%d}.{fmt}"'
+    return response
 
 
 @user_passes_test(staff_check)
 def error_dashboard(request):
-    """Developer only dashboard for monitoring errors."""
-    errors = SystemErrorLog.objects.all().order_by('-created_at')
+    """Developer only dashboard for monitoring errors, grouped by fingerprint/path."""
     show_resolved = request.GET.get('resolved') == 'true'
-    if not show_resolved:
-        errors = errors.filter(resolved=False)
-    return render(request, 'dev/error_dashboard.html', {'errors': errors, 'showing_resolved': show_resolved})
+    errors = SystemErrorLog.objects.filter(resolved=show_resolved)
+
+    groups = errors.values('fingerprint', 'path', 'method').annotate(
+        latest_id=Max('id'),
+        total=Sum('occurrences'),
+        users=Count('user', distinct=True),
+        first_seen=Min('created_at'),
+        last_seen=Max('last_seen'),
+    ).order_by('-last_seen', '-latest_id')
+    page = Paginator(groups, settings.ERRORS_PER_PAGE).get_page(request.GET.get('page'))
+    # Message and status of each group's most recent row
+    page.object_list = list(page.object_list)
+    latest = SystemErrorLog.objects.only('error_message', 'status_code').in_bulk(
+        [group['latest_id'] for group in page.object_list]
+    )
+    for group in page.object_list:
+        group['error_message'] = latest[group['latest_id']].error_message
+        group['status_code'] = latest[group['latest_id']].status_code
+
+    # Rates come from the per-hour buckets: a row's occurrences are lifetime totals
+    now = timezone.now()
+    this_hour = now.replace(minute=0, second=0, microsecond=0)
+    start = this_hour - timedelta(hours=23)
+    buckets = dict(
+        ErrorHourlyCount.objects.filter(error__resolved=show_resolved, hour__gte=start)
+        .values('hour').annotate(total=Sum('count')).order_by().values_list('hour', 'total')
+    )
+    hourly = [(start + timedelta(hours=i), buckets.get(start + timedelta(hours=i), 0)) for i in range(24)]
+    peak = max([total for _, total in hourly] + [1])
+    summary = errors.aggregate(total=Coalesce(Sum('occurrences'), 0))
+    summary['this_hour'] = buckets.get(this_hour, 0)
+    summary['last_day'] = sum(total for _, total in hourly)
+
+    return render(request, 'dev/error_dashboard.html', {
+        'page': page,
+        'summary': summary,
+        'hourly': [(hour, total, round(total * 100 / peak)) for hour, total in hourly],
+        'writer': get_writer().stats(),
+        'showing_resolved': show_resolved,
+    })
+
+
+def _process_samples():
+    """Process-wide cache and error-writer numbers, next to the per-view metrics."""
+    cache = caching.stats()
+    writer = get_writer().stats()
+    return [
+        ('delicious_query_cache_hits_total', 'counter', 'Versioned query cache hits.', cache['hits']),
+        ('delicious_query_cache_misses_total', 'counter', 'Versioned query cache misses.', cache['misses']),
+        ('delicious_error_log_queued', 'gauge', 'Error records waiting for the writer.', writer['queued']),
+        ('delicious_error_log_written_total', 'counter', 'Error records written.', writer['written']),
+        ('delicious_error_log_dropped_total', 'counter', 'Error records dropped on a full queue.', writer['dropped']),
+        ('delicious_error_log_failed_total', 'counter', 'Error records lost to failed writes.', writer['failed']),
+    ]
+
+
+def _metrics_text(request):
+    return HttpResponse(metrics.prometheus_text(_process_samples()), content_type=metrics.CONTENT_TYPE)
+
+
+def metrics_export(request):
+    """Per-view request metrics of this process, in the Prometheus text format.
+
+    Open to staff and to scrapers allowed by ``metrics.scrape_allowed``.
+    """
+    if metrics.scrape_allowed(request):
+        return _metrics_text(request)
+    return user_passes_test(staff_check)(_metrics_text)(request)
+
+
+@user_passes_test(staff_check)
+def metrics_dashboard(request):
+    """Per-view latency, query and render summary of this process."""
+    return render(request, 'dev/metrics_dashboard.html', {
+        'views': metrics.summary(),
+        'cache': caching.stats(),
+        'writer': get_writer().stats(),
+    })
+
+
+@user_passes_test(staff_check)
+def error_traceback(request, error_id):
+    """Traceback text for one error, fetched when the trace modal opens."""
+    error = get_object_or_404(SystemErrorLog.objects.only('traceback'), id=error_id)
+    return HttpResponse(error.traceback, content_type='text/plain; charset=utf-8')
 
 
 @user_passes_test(staff_check)
 @require_POST
 def resolve_error(request, error_id):
     error = get_object_or_404(SystemErrorLog, id=error_id)
-    error.delete()
+    # Resolve the whole group the row belongs to
+    SystemErrorLog.objects.filter(
+        fingerprint=error.fingerprint, path=error.path, method=error.method, resolved=error.resolved,
+    ).delete()
     messages.success(request, 'Error log resolved and deleted.')
     return redirect('error_dashboard')
 
@@ -284,7 +677,10 @@ def custom_500(request):
 
 @login_required
 def profile_view(request):
-    user_profile, created = UserProfile.objects.get_or_create(user=request.user)
+    # The cached session user (recipes.backends) comes with its profile
+    user_profile = getattr(request.user, 'profile', None)
+    if user_profile is None:
+        user_profile, created = UserProfile.objects.get_or_create(user=request.user)
     profile_form = UserProfileForm(instance=user_profile)
     info_form = UserInfoForm(instance=request.user)
     password_form = ChangePasswordForm(request.user)